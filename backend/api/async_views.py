@@ -0,0 +1,125 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import (HttpResponse, HttpResponseNotAllowed,
+                         HttpResponseNotFound)
+from django.shortcuts import redirect
+from recipe.models import Ingredient, ShortLink, Tag
+from rest_framework import exceptions
+
+from .cache import get_or_build, query_cache_key
+from .filters import IngredientFilter
+from .renderers import ORJSONRenderer
+from .serializers import IngredientSerializer, TagSerializer
+from .views import IngredientViewSet, TagViewSet
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+renderer = ORJSONRenderer()
+
+
+def json_response(data, status=200):
+    return HttpResponse(
+        renderer.render(data),
+        content_type=renderer.media_type,
+        status=status
+    )
+
+
+def not_found():
+    return json_response(
+        {'detail': str(exceptions.NotFound.default_detail)}, status=404
+    )
+
+
+def read_only(view):
+    """Разрешает асинхронному представлению только безопасные методы.
+
+    Стандартные декораторы Django 3.2 не поддерживают асинхронные
+    представления, поэтому проверка метода и ``csrf_exempt`` заданы здесь.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return HttpResponseNotAllowed(SAFE_METHODS)
+        return await view(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = True
+    return wrapper
+
+
+@sync_to_async
+def get_short_link_url(short_code):
+    return ShortLink.objects.filter(
+        short_url=short_code
+    ).values_list('original_url', flat=True).first()
+
+
+@sync_to_async
+def get_cached_list(viewset, basename, request, queryset):
+    """Список из того же кеша, что и у ``CachedListMixin`` представления."""
+    return get_or_build(
+        query_cache_key(f'{basename}:list', viewset.cache_scopes, request.GET),
+        lambda: viewset.serializer_class(queryset, many=True).data,
+        settings.REFERENCE_LIST_CACHE_TTL
+    )
+
+
+@sync_to_async
+def serialize_object(serializer_class, queryset, pk):
+    instance = queryset.filter(pk=pk).first()
+    if instance is None:
+        return None
+    return serializer_class(instance).data
+
+
+@read_only
+async def redirect_short_link(request, short_code):
+    """Асинхронная обработка короткой ссылки."""
+    original_url = await get_short_link_url(short_code)
+    if original_url is None:
+        return HttpResponseNotFound()
+    base_url = f"{request.scheme}://{request.get_host()}"
+    return redirect(f"{base_url}{original_url}")
+
+
+@read_only
+async def tag_list(request):
+    """Асинхронный список тегов."""
+    return json_response(
+        await get_cached_list(TagViewSet, 'tags', request, Tag.objects.all())
+    )
+
+
+@read_only
+async def tag_detail(request, pk):
+    """Асинхронное получение тега."""
+    data = await serialize_object(TagSerializer, Tag.objects.all(), pk)
+    if data is None:
+        return not_found()
+    return json_response(data)
+
+
+@read_only
+async def ingredient_list(request):
+    """Асинхронный список ингредиентов с фильтром по названию."""
+    filterset = IngredientFilter(
+        request.GET, queryset=Ingredient.objects.all(), request=request
+    )
+    if not filterset.is_valid():
+        return json_response(filterset.errors, status=400)
+    return json_response(await get_cached_list(
+        IngredientViewSet, 'ingredients', request, filterset.qs
+    ))
+
+
+@read_only
+async def ingredient_detail(request, pk):
+    """Асинхронное получение ингредиента."""
+    data = await serialize_object(
+        IngredientSerializer, Ingredient.objects.all(), pk
+    )
+    if data is None:
+        return not_found()
+    return json_response(data)
@@ -0,0 +1,57 @@
+import copy
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from backend.routers import replicas_enabled, use_primary
+
+from .cache import LocalLRUCache
+
+token_cache = LocalLRUCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.TOKEN_CACHE_TTL
+)
+
+
+def invalidate_token(key):
+    """Удаляет токен из кеша аутентификации."""
+    token_cache.delete(key)
+
+
+def invalidate_user_tokens(user_id):
+    """Удаляет из кеша аутентификации все токены пользователя."""
+    token_cache.evict(lambda key, value: value[0].pk == user_id)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешированием пользователя в процессе.
+
+    Кеш ограничен по размеру и времени жизни записей и сбрасывается
+    сигналами при удалении токена, выходе и изменении пользователя.
+    """
+
+    def load_credentials(self, key):
+        """Пользователь и токен из базы.
+
+        Токен, ещё не попавший на реплику, ищется в основной базе.
+        """
+        try:
+            return super().authenticate_credentials(key)
+        except exceptions.AuthenticationFailed:
+            if not replicas_enabled():
+                raise
+        with use_primary():
+            return super().authenticate_credentials(key)
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = self.load_credentials(key)
+            token_cache.set(key, cached)
+        user, token = cached
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed(
+                _('User inactive or deleted.')
+            )
+        return copy.copy(user), token
@@ -0,0 +1,370 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date
+from recipe.models import Follow, Tag
+from rest_framework import status
+
+from backend.routers import use_primary
+
+from .constants import (CACHE_LOCK_TIMEOUT, CACHE_LOCK_WAIT, CACHE_STALE_TTL,
+                        FOLLOWING_CACHE_TTL, RECIPE_LIST_CACHE_PARAMS)
+from .renderers import ORJSONRenderer
+
+etag_renderer = ORJSONRenderer()
+
+
+class LocalLRUCache:
+    """Ограниченный по размеру LRU-кеш процесса с временем жизни записей."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def evict(self, predicate):
+        """Удаляет записи, для которых ``predicate(key, value)`` истинно."""
+        with self._lock:
+            for key in [
+                key for key, (_, value) in self._data.items()
+                if predicate(key, value)
+            ]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class Flight:
+    """Вычисление значения, результата которого ждут другие потоки."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Объединяет одновременные вычисления одного ключа в процессе.
+
+    Первый поток вычисляет значение, остальные потоки с тем же ключом
+    ждут и получают его результат или исключение.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = func()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+
+local_cache = LocalLRUCache(
+    settings.LOCAL_CACHE_SIZE, settings.LOCAL_CACHE_TTL
+)
+version_cache = LocalLRUCache(
+    settings.LOCAL_CACHE_SIZE, settings.LOCAL_CACHE_TTL
+)
+single_flight = SingleFlight()
+
+
+def version_key(scope):
+    return f'version:{scope}'
+
+
+def get_versions(*scopes):
+    """Текущие версии областей кеша.
+
+    Версия области входит в ключи зависящих от неё записей, поэтому
+    увеличение версии делает все такие записи недоступными. Версии
+    копируются в память процесса на ``LOCAL_CACHE_TTL`` секунд, и
+    попадание в кеш процесса не требует обращения к общему кешу.
+    Увеличение версии в другом процессе становится видно с этой задержкой.
+    """
+    versions = {scope: version_cache.get(scope) for scope in scopes}
+    missing = [scope for scope, version in versions.items() if not version]
+    if missing:
+        keys = [version_key(scope) for scope in missing]
+        shared = cache.get_many(keys)
+        absent = [key for key in keys if key not in shared]
+        for key in absent:
+            cache.add(key, time.time_ns(), timeout=None)
+        if absent:
+            shared.update(cache.get_many(absent))
+        for scope, key in zip(missing, keys):
+            versions[scope] = shared.get(key, 0)
+            version_cache.set(scope, versions[scope])
+    return tuple(versions[scope] for scope in scopes)
+
+
+def bump_versions(*scopes):
+    """Инвалидирует все записи, зависящие от указанных областей.
+
+    Внутри транзакции версии увеличиваются после её фиксации, чтобы
+    другие процессы не закешировали данные до изменения под новой версией.
+    """
+    def bump():
+        for scope in scopes:
+            key = version_key(scope)
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.add(key, time.time_ns(), timeout=None)
+            version_cache.delete(scope)
+
+    transaction.on_commit(bump)
+
+
+def get_or_build(key, builder, ttl):
+    """Значение из двухуровневого кеша с защитой от одновременного пересчёта.
+
+    Свежие записи общего кеша копируются в кеш процесса на
+    ``LOCAL_CACHE_TTL`` секунд. Ключи записей содержат версии областей,
+    поэтому инвалидация действует на оба уровня. Одновременные промахи
+    по одному ключу в процессе объединяются в одно обращение к общему кешу.
+    Возвращаемое значение общее для потоков и не должно изменяться.
+    """
+    value = local_cache.get(key)
+    if value is not None:
+        return value
+    return single_flight.do(
+        key, lambda: get_or_build_shared(key, builder, ttl)
+    )
+
+
+def get_or_build_shared(key, builder, ttl):
+    """Значение из общего кеша с защитой от одновременного пересчёта.
+
+    Запись хранится дольше своего срока свежести: пока один процесс
+    пересчитывает устаревшее значение под блокировкой, остальные отдают
+    устаревшее. Если значения нет совсем, остальные недолго ждут результата.
+    Значение строится по основной базе: отстающая реплика сохранила бы
+    под новой версией данные до изменения.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.time():
+        return remember_locally(key, entry)
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, CACHE_LOCK_TIMEOUT):
+        try:
+            with use_primary():
+                entry = (time.time() + ttl, builder())
+            cache.set(key, entry, ttl + CACHE_STALE_TTL)
+        finally:
+            cache.delete(lock_key)
+        return remember_locally(key, entry)
+    if entry is not None:
+        return entry[1]
+    deadline = time.monotonic() + CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+    with use_primary():
+        return builder()
+
+
+def remember_locally(key, entry):
+    """Сохраняет свежую запись общего кеша в кеше процесса."""
+    fresh_until, value = entry
+    ttl = min(settings.LOCAL_CACHE_TTL, fresh_until - time.time())
+    if ttl > 0 and value is not None:
+        local_cache.set(key, value, ttl)
+    return value
+
+
+def scoped_cache_key(prefix, scopes, *parts):
+    """Ключ записи, инвалидируемой при изменении любой из ``scopes``."""
+    versions = '.'.join(map(str, get_versions(*scopes)))
+    return ':'.join(map(str, (prefix, versions, *parts)))
+
+
+def query_cache_key(prefix, scopes, query_params):
+    """Ключ ответа, зависящего только от параметров запроса и ``scopes``."""
+    params = hashlib.md5(
+        urlencode(sorted(query_params.lists()), doseq=True).encode()
+    ).hexdigest()
+    return scoped_cache_key(prefix, scopes, params)
+
+
+def recipe_scopes(author_id, recipe_id):
+    """Области кеша, которые затрагивает изменение рецепта."""
+    return ('recipes', f'recipes:author:{author_id}', f'recipe:{recipe_id}')
+
+
+def author_scopes(author_id):
+    """Области кеша, которые затрагивает изменение профиля автора."""
+    return ('recipes', f'recipes:author:{author_id}', f'author:{author_id}')
+
+
+def anonymous_list_cache_key(request):
+    """Ключ кеша страницы списка рецептов для анонимного пользователя.
+
+    Возвращает ``None``, если запрос не подлежит кешированию.
+    """
+    if request.user.is_authenticated:
+        return None
+    params = request.query_params
+    if any(name not in RECIPE_LIST_CACHE_PARAMS for name in params):
+        return None
+    author = params.get('author')
+    if author is not None and not author.isdigit():
+        return None
+    scopes = (
+        f'recipes:author:{author}' if author else 'recipes',
+        'tags',
+        'ingredients',
+    )
+    normalized = '&'.join(
+        f'{name}={",".join(sorted(set(params.getlist(name))))}'
+        for name in sorted(params)
+    )
+    return scoped_cache_key(
+        'recipes:page', scopes, request.get_host(), normalized
+    )
+
+
+def recipe_detail_cache_key(request, recipe_id, author_id):
+    """Ключ кеша не зависящей от пользователя части рецепта."""
+    return scoped_cache_key(
+        f'recipes:detail:{recipe_id}',
+        (f'recipe:{recipe_id}', f'author:{author_id}', 'tags', 'ingredients'),
+        request.get_host()
+    )
+
+
+def get_tag_ids_by_slug():
+    """Соответствие слагов тегов их идентификаторам.
+
+    Словарь общий для потоков процесса и не должен изменяться.
+    """
+    return get_or_build(
+        scoped_cache_key('tags:slugs', ('tags', )),
+        lambda: dict(Tag.objects.values_list('slug', 'id')),
+        settings.REFERENCE_LIST_CACHE_TTL
+    )
+
+
+def following_cache_key(user_id):
+    return f'users:following:{user_id}'
+
+
+def get_following_ids(request):
+    """Идентификаторы авторов, на которых подписан пользователь запроса.
+
+    Множество загружается один раз за запрос из основной базы и кешируется
+    между запросами до изменения подписок пользователя.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return frozenset()
+    following_ids = getattr(request, '_following_ids', None)
+    if following_ids is None:
+        key = following_cache_key(user.id)
+        following_ids = cache.get(key)
+        if following_ids is None:
+            with use_primary():
+                following_ids = frozenset(
+                    Follow.objects.filter(user=user).values_list(
+                        'following_id', flat=True
+                    )
+                )
+            cache.set(key, following_ids, FOLLOWING_CACHE_TTL)
+        request._following_ids = following_ids
+    return following_ids
+
+
+def invalidate_following_ids(user_id, request=None):
+    """Сбрасывает кеш подписок пользователя."""
+    cache.delete(following_cache_key(user_id))
+    if request is not None:
+        request._following_ids = None
+
+
+def make_etag(*parts):
+    """Слабый ETag по данным, от которых зависит тело ответа."""
+    digest = hashlib.md5(etag_renderer.render(parts)).hexdigest()
+    return f'W/"{digest}"'
+
+
+def not_modified(request, etag):
+    """Истинно, если ``If-None-Match`` запроса совпадает с ``etag``."""
+    response = get_conditional_response(request, etag=etag)
+    return (
+        response is not None
+        and response.status_code == status.HTTP_304_NOT_MODIFIED
+    )
+
+
+def set_validators(response, request, etag, last_modified=None):
+    """Добавляет в ответ ETag, Last-Modified и Cache-Control.
+
+    Ответы анонимным пользователям могут храниться общими кешами
+    ``RECIPE_HTTP_MAX_AGE`` секунд, ответы пользователям — только
+    в кеше клиента с проверкой при каждом запросе.
+    """
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.RECIPE_HTTP_MAX_AGE
+        )
+    patch_vary_headers(response, ('Accept', 'Authorization'))
+    return response
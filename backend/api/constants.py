@@ -1,3 +1,18 @@
 MAX_LENGTH_NAME: int = 150
 MAX_LENGTH_EMAIL: int = 254
 REGEX_USERNAME: str = r'^[\w.@+-]+\Z'
+MAX_MISSING_INGREDIENTS: int = 2
+MAX_AVAILABLE_INGREDIENTS: int = 200
+MAX_COOKABLE_RECIPES: int = 1000
+SIMILAR_RECIPES_LIMIT: int = 6
+MAX_SIMILAR_RECIPES_LIMIT: int = 50
+MAX_BATCH_RECIPES: int = 100
+RECIPE_LIST_CACHE_PARAMS: tuple = (
+    'page', 'limit', 'tags', 'author', 'fields', 'expand', 'ordering',
+    'cooking_time_min', 'cooking_time_max'
+)
+EXPANDABLE_RECIPE_FIELDS: tuple = ('author', 'tags', 'ingredients')
+CACHE_STALE_TTL: int = 300
+CACHE_LOCK_TIMEOUT: int = 10
+CACHE_LOCK_WAIT: float = 2.0
+FOLLOWING_CACHE_TTL: int = 300
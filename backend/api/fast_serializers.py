@@ -0,0 +1,268 @@
+from functools import lru_cache
+
+from django.contrib.auth import get_user_model
+from recipe.models import Favorite, IngredientRecipe, Recipe, ShoppingCart
+
+from .cache import get_following_ids
+from .serializers import (CustomUserSerializer, IngredientRecipeSerializer,
+                          RecipeSerializer, TagSerializer)
+
+User = get_user_model()
+
+
+def compile_plan(fields, builders):
+    """Собирает функцию построения словаря по списку полей сериализатора.
+
+    Порядок ключей совпадает с порядком ``Meta.fields`` сериализатора,
+    поэтому результат идентичен выводу DRF.
+    """
+    plan = tuple((name, builders[name]) for name in fields)
+
+    def build(row, context):
+        return {name: builder(row, context) for name, builder in plan}
+
+    return build
+
+
+def column(name):
+    return lambda row, context: row[name]
+
+
+def file_url(field):
+    """Повторяет ``ImageField.to_representation`` для имени файла."""
+    storage = field.storage
+
+    def build(name, context):
+        if not name:
+            return None
+        url = storage.url(name)
+        request = context['request']
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url
+
+    return build
+
+
+recipe_image_url = file_url(Recipe._meta.get_field('image'))
+avatar_url = file_url(User._meta.get_field('avatar'))
+
+build_tag = compile_plan(TagSerializer.Meta.fields, {
+    'id': column('tag_id'),
+    'name': column('tag__name'),
+    'slug': column('tag__slug'),
+})
+
+build_ingredient = compile_plan(IngredientRecipeSerializer.Meta.fields, {
+    'id': column('ingredient_id'),
+    'name': column('ingredient__name'),
+    'measurement_unit': column('ingredient__measurement_unit'),
+    'amount': column('amount'),
+})
+
+build_author = compile_plan(CustomUserSerializer.Meta.fields, {
+    'email': column('email'),
+    'id': column('id'),
+    'username': column('username'),
+    'first_name': column('first_name'),
+    'last_name': column('last_name'),
+    'is_subscribed': (
+        lambda row, context: row['id'] in context['following']
+    ),
+    'avatar': lambda row, context: avatar_url(row['avatar'], context),
+})
+
+recipe_builders = {
+    'ingredients': (
+        lambda row, context: [
+            build_ingredient(item, context)
+            for item in context['ingredients'].get(row['id'], ())
+        ]
+    ),
+    'tags': (
+        lambda row, context: [
+            build_tag(item, context)
+            for item in context['tags'].get(row['id'], ())
+        ]
+    ),
+    'image': lambda row, context: recipe_image_url(row['image'], context),
+    'name': column('name'),
+    'text': column('text'),
+    'cooking_time': column('cooking_time'),
+    'id': column('id'),
+    'author': (
+        lambda row, context: build_author(
+            context['authors'][row['author_id']], context
+        )
+    ),
+    'is_favorited': lambda row, context: row['id'] in context['favorited'],
+    'is_in_shopping_cart': (
+        lambda row, context: row['id'] in context['in_shopping_cart']
+    ),
+    'views_count': column('views_count'),
+}
+
+collapsed_builders = {
+    'ingredients': (
+        lambda row, context: [
+            {'id': item['ingredient_id'], 'amount': item['amount']}
+            for item in context['ingredients'].get(row['id'], ())
+        ]
+    ),
+    'tags': (
+        lambda row, context: [
+            item['tag_id'] for item in context['tags'].get(row['id'], ())
+        ]
+    ),
+    'author': column('author_id'),
+}
+
+recipe_columns = {
+    'image': 'image',
+    'name': 'name',
+    'text': 'text',
+    'cooking_time': 'cooking_time',
+    'author': 'author_id',
+    'views_count': 'views_count',
+}
+
+
+@lru_cache(maxsize=None)
+def get_recipe_plan(fields, expand):
+    """План построения рецепта для набора полей и вложенных связей."""
+    builders = dict(recipe_builders)
+    for name, builder in collapsed_builders.items():
+        if name not in expand:
+            builders[name] = builder
+    return compile_plan(fields, builders)
+
+
+def group_by_recipe(rows):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row['recipe_id'], []).append(row)
+    return grouped
+
+
+class FastRecipeSerializer:
+    """Быстрая сериализация рецептов только для чтения.
+
+    Строит тот же ответ, что и ``RecipeSerializer``, из строк ``values()``:
+    рецепты, авторы, теги, ингредиенты и пользовательские флаги
+    загружаются фиксированным числом запросов на всю страницу.
+    Для ``sparse_fields`` из контекста запрашиваются только нужные
+    столбцы и связи.
+    """
+
+    author_columns = (
+        'id', 'email', 'username', 'first_name', 'last_name', 'avatar'
+    )
+
+    def __init__(self, recipe_ids, context, personalize=True):
+        self.recipe_ids = list(recipe_ids)
+        self.request = context.get('request')
+        self.personalize = personalize
+        self.fields, self.expand = context.get('sparse_fields') or (
+            RecipeSerializer.Meta.fields, frozenset(collapsed_builders)
+        )
+
+    def is_personalized(self):
+        user = getattr(self.request, 'user', None)
+        return (
+            self.personalize
+            and user is not None
+            and user.is_authenticated
+        )
+
+    def get_user_recipe_ids(self, model, recipe_ids):
+        if not self.is_personalized():
+            return set()
+        return set(model.objects.filter(
+            user=self.request.user, recipe_id__in=recipe_ids
+        ).values_list('recipe_id', flat=True))
+
+    def get_authors(self, recipes):
+        author_ids = {row['author_id'] for row in recipes.values()}
+        return {
+            row['id']: row for row in User.objects.filter(
+                id__in=author_ids
+            ).values(*self.author_columns)
+        }
+
+    def get_tags(self, recipe_ids):
+        columns = ('recipe_id', 'tag_id')
+        if 'tags' in self.expand:
+            columns += ('tag__name', 'tag__slug')
+        return group_by_recipe(
+            Recipe.tags.through.objects.filter(
+                recipe_id__in=recipe_ids
+            ).order_by('id').values(*columns)
+        )
+
+    def get_ingredients(self, recipe_ids):
+        columns = ('recipe_id', 'ingredient_id', 'amount')
+        if 'ingredients' in self.expand:
+            columns += ('ingredient__name', 'ingredient__measurement_unit')
+        return group_by_recipe(
+            IngredientRecipe.objects.filter(
+                recipe_id__in=recipe_ids
+            ).order_by('id').values(*columns)
+        )
+
+    @property
+    def data(self):
+        recipe_ids = set(self.recipe_ids)
+        if not recipe_ids:
+            return []
+        fields = self.fields
+        columns = ['id'] + [
+            recipe_columns[name] for name in fields if name in recipe_columns
+        ]
+        recipes = {
+            row['id']: row for row in Recipe.objects.filter(
+                id__in=recipe_ids
+            ).values(*columns)
+        }
+        context = {'request': self.request}
+        if 'author' in fields and 'author' in self.expand:
+            context['authors'] = self.get_authors(recipes)
+            context['following'] = (
+                get_following_ids(self.request)
+                if self.is_personalized() else frozenset()
+            )
+        if 'tags' in fields:
+            context['tags'] = self.get_tags(recipe_ids)
+        if 'ingredients' in fields:
+            context['ingredients'] = self.get_ingredients(recipe_ids)
+        if 'is_favorited' in fields:
+            context['favorited'] = self.get_user_recipe_ids(
+                Favorite, recipe_ids
+            )
+        if 'is_in_shopping_cart' in fields:
+            context['in_shopping_cart'] = self.get_user_recipe_ids(
+                ShoppingCart, recipe_ids
+            )
+        build = get_recipe_plan(fields, self.expand)
+        return [
+            build(recipes[recipe_id], context)
+            for recipe_id in self.recipe_ids
+            if recipe_id in recipes
+        ]
+
+
+def prune_recipe(data, sparse_fields):
+    """Оставляет в полном ответе рецепта только запрошенные поля."""
+    if sparse_fields is None:
+        return data
+    fields, expand = sparse_fields
+    pruned = {name: data[name] for name in fields}
+    if 'author' in pruned and 'author' not in expand:
+        pruned['author'] = data['author']['id']
+    if 'tags' in pruned and 'tags' not in expand:
+        pruned['tags'] = [tag['id'] for tag in data['tags']]
+    if 'ingredients' in pruned and 'ingredients' not in expand:
+        pruned['ingredients'] = [
+            {'id': item['id'], 'amount': item['amount']}
+            for item in data['ingredients']
+        ]
+    return pruned
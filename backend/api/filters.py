@@ -1,5 +1,52 @@
 from django_filters import rest_framework as filters
-from recipe.models import Ingredient, Recipe, Tag
+from django_filters.constants import EMPTY_VALUES
+from recipe.models import Ingredient, Recipe
+
+from .cache import get_tag_ids_by_slug
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """Сортировка, дополненная порядком модели по умолчанию.
+
+    Записи с равными значениями поля сортировки не меняются местами
+    между страницами.
+    """
+
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        return qs.order_by(
+            *(self.get_ordering_value(param) for param in value),
+            *qs.model._meta.ordering,
+            'pk'
+        )
+
+
+class TagSlugFilter(filters.MultipleChoiceFilter):
+    """Рецепты с любым из тегов, заданных слагами.
+
+    Слаги проверяются и переводятся в идентификаторы по кешу тегов,
+    а рецепты отбираются по индексу тегов ``field_name`` без соединения
+    с таблицей связей.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('choices', self.get_choices)
+        super().__init__(*args, **kwargs)
+
+    @staticmethod
+    def get_choices():
+        return [(slug, slug) for slug in get_tag_ids_by_slug()]
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        tag_ids = get_tag_ids_by_slug()
+        return qs.filter(**{
+            f'{self.field_name}__overlap': [
+                tag_ids[slug] for slug in value if slug in tag_ids
+            ]
+        })
 
 
 class RecipeFilter(filters.FilterSet):
@@ -14,11 +61,11 @@ class RecipeFilter(filters.FilterSet):
         label='Рецепты в списке покупок'
     )
     author = filters.NumberFilter(field_name='author__id', label='Автор')
-    tags = filters.ModelMultipleChoiceFilter(
-        queryset=Tag.objects.all(),
-        field_name='tags__slug',
-        label='Теги',
-        to_field_name='slug'
+    tags = TagSlugFilter(field_name='tag_ids', label='Теги')
+    cooking_time = filters.RangeFilter(label='Время приготовления')
+    ordering = StableOrderingFilter(
+        fields=('views_count', 'created', 'cooking_time'),
+        label='Сортировка'
     )
 
     class Meta:
@@ -1,4 +1,7 @@
-from rest_framework.pagination import PageNumberPagination
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 from rest_framework.response import Response
 
 
@@ -13,3 +16,63 @@ class CustomPagination(PageNumberPagination):
             'previous': self.get_previous_link(),
             'results': data
         })
+
+
+class FeedPagination(CursorPagination):
+    """Курсорный пагинатор ленты подписок по ключам (дата, рецепт).
+
+    Страница строится функцией ``get_keys(limit, position, reverse)``,
+    возвращающей до ``limit + 1`` ключей после позиции курсора.
+    """
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-created', '-id')
+
+    def paginate_keys(self, get_keys, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor.reverse
+        position = None if cursor is None else self.parse_position(
+            cursor.position
+        )
+        keys = get_keys(self.page_size, position, reverse)
+        has_more = len(keys) > self.page_size
+        keys = keys[:self.page_size]
+        if reverse:
+            keys.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, cursor is not None
+        self.next_link = self.get_key_link(keys, -1, False, has_next)
+        self.previous_link = self.get_key_link(keys, 0, True, has_previous)
+        return keys
+
+    def parse_position(self, position):
+        created, _, object_id = (position or '').partition('|')
+        try:
+            created = parse_datetime(created)
+            object_id = int(object_id)
+        except ValueError:
+            created = None
+        if created is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created, object_id
+
+    def get_key_link(self, keys, index, reverse, exists):
+        if not keys or not exists:
+            return None
+        created, object_id = keys[index]
+        return self.encode_cursor(Cursor(
+            offset=0,
+            reverse=reverse,
+            position=f'{created.isoformat()}|{object_id}'
+        ))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.next_link,
+            'previous': self.previous_link,
+            'results': data
+        })
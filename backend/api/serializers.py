@@ -1,14 +1,22 @@
 import base64
 
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.core.files.base import ContentFile
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer
 from recipe.models import (Favorite, Follow, Ingredient, IngredientRecipe,
                            Recipe, ShoppingCart, Tag)
+from recipe.services import refresh_recipe_indexes
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework.validators import UniqueValidator
 
-from .constants import MAX_LENGTH_EMAIL, MAX_LENGTH_NAME, REGEX_USERNAME
+from .cache import get_following_ids
+from .constants import (EXPANDABLE_RECIPE_FIELDS, MAX_AVAILABLE_INGREDIENTS,
+                        MAX_BATCH_RECIPES, MAX_LENGTH_EMAIL, MAX_LENGTH_NAME,
+                        MAX_MISSING_INGREDIENTS, MAX_SIMILAR_RECIPES_LIMIT,
+                        REGEX_USERNAME, SIMILAR_RECIPES_LIMIT)
 
 User = get_user_model()
 
@@ -24,6 +32,48 @@ class Base64ImageField(serializers.ImageField):
         return super().to_internal_value(data)
 
 
+class BatchedManyRelatedField(serializers.ManyRelatedField):
+    """Список связанных объектов, загружаемых одним запросом."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        queryset = child.get_queryset()
+        pk_field = queryset.model._meta.pk
+        pks = []
+        for item in data:
+            if child.pk_field is not None:
+                item = child.pk_field.to_internal_value(item)
+            try:
+                if isinstance(item, bool):
+                    raise TypeError
+                pks.append(pk_field.to_python(item))
+            except (TypeError, ValueError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(item).__name__)
+        objects = queryset.in_bulk(set(pks))
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+class BatchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Поле первичного ключа, которое при ``many=True`` загружает все
+    объекты одним запросом.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BatchedManyRelatedField(**list_kwargs)
+
+
 class CustomUserMixin:
     """Миксин для модели пользователя."""
 
@@ -75,10 +125,7 @@ class CustomUserSerializer(CustomUserMixin, serializers.ModelSerializer):
         read_only_fields = ('avatar', 'is_subscribed')
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
-            return False
-        return obj.followers.filter(user=user).exists()
+        return obj.id in get_following_ids(self.context.get('request'))
 
 
 class RecipeListFollowSerializer(serializers.Serializer):
@@ -102,13 +149,6 @@ class RecipeListFollowSerializer(serializers.Serializer):
                     {"detail": "Нельзя подписываться на самого себя"}
                 )
 
-            if Follow.objects.filter(
-                user=user, following=user_to_subscribe
-            ).exists():
-                raise serializers.ValidationError(
-                    {"detail": "Вы уже подписаны на этого пользователя"}
-                )
-
         return data
 
 
@@ -164,6 +204,16 @@ class IngredientRecipeSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit', 'amount')
 
 
+class IngredientAmountSerializer(serializers.ModelSerializer):
+    """Ингредиент рецепта без данных справочника."""
+
+    id = serializers.IntegerField(source='ingredient_id')
+
+    class Meta:
+        model = IngredientRecipe
+        fields = ('id', 'amount')
+
+
 class RecipeBaseSerializer(serializers.ModelSerializer):
     """Базовый сериализатор рецептов."""
 
@@ -171,8 +221,8 @@ class RecipeBaseSerializer(serializers.ModelSerializer):
         source='ingredient_recipes', required=True, many=True
     )
     image = Base64ImageField(required=True, allow_null=True)
-    tags = serializers.PrimaryKeyRelatedField(queryset=Tag.objects.all(),
-                                              many=True)
+    tags = BatchedPrimaryKeyRelatedField(queryset=Tag.objects.all(),
+                                         many=True)
 
     class Meta:
         model = Recipe
@@ -188,7 +238,11 @@ class RecipeBaseSerializer(serializers.ModelSerializer):
         return value
 
     def validate_ingredients(self, value):
-        """Валидация списка ингредиентов."""
+        """Валидация списка ингредиентов.
+
+        Ингредиенты загружаются одним запросом и передаются в
+        ``create``/``update`` вместо идентификаторов.
+        """
         if not value:
             raise serializers.ValidationError(
                 "Список ингредиентов не может быть пустым."
@@ -211,40 +265,33 @@ class RecipeBaseSerializer(serializers.ModelSerializer):
             unique_ids.add(item_id)
             item_ids.append(item_id)
 
-        existing_items = Ingredient.objects.filter(id__in=item_ids)
-        missing_ids = set(item_ids) - set(
-            existing_items.values_list('id', flat=True)
-        )
+        existing_items = Ingredient.objects.in_bulk(item_ids)
+        missing_ids = [
+            item_id for item_id in item_ids if item_id not in existing_items
+        ]
         if missing_ids:
             raise serializers.ValidationError(
                 f"Ингредиенты {', '.join(map(str, missing_ids))} не найдены."
             )
 
-        return value
+        return [
+            {
+                'ingredient': existing_items[item['ingredient']['id']],
+                'amount': item['amount']
+            }
+            for item in value
+        ]
 
     def validate_tags(self, value):
-        """Валидация списка ингредиентов."""
+        """Валидация списка тегов."""
         if not value:
             raise serializers.ValidationError(
                 "Список тегов не может быть пустым."
             )
 
-        unique_name = set()
-        item_name = []
-
-        for item in value:
-            if item in unique_name:
-                raise serializers.ValidationError(
-                    "Теги должны быть уникальными."
-                )
-            unique_name.add(item)
-            item_name.append(item)
-
-        existing_items = Tag.objects.filter(name__in=item_name)
-        missing_names = set(item_name) - set(existing_items)
-        if missing_names:
+        if len(set(value)) != len(value):
             raise serializers.ValidationError(
-                f"Теги: {', '.join(map(str, missing_names))} не найдены."
+                "Теги должны быть уникальными."
             )
 
         return value
@@ -253,25 +300,24 @@ class RecipeBaseSerializer(serializers.ModelSerializer):
 class RecipeCreateUpdateSerializer(RecipeBaseSerializer):
     """Сериализатор создания и обновления рецепта."""
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredient_recipes')
         tags_data = validated_data.pop('tags')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags_data)
-
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data['ingredient']['id']
-
-            amount = ingredient_data['amount']
-
-            ingredient = Ingredient.objects.get(id=ingredient_id)
-            IngredientRecipe.objects.create(
+        IngredientRecipe.objects.bulk_create(
+            IngredientRecipe(
                 recipe=recipe,
-                ingredient=ingredient,
-                amount=amount
+                ingredient=ingredient_data['ingredient'],
+                amount=ingredient_data['amount']
             )
+            for ingredient_data in ingredients_data
+        )
+        refresh_recipe_indexes([recipe.id])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         required_fields = [
             'name', 'text', 'cooking_time',
@@ -289,25 +335,29 @@ class RecipeCreateUpdateSerializer(RecipeBaseSerializer):
         ingredients_data = validated_data.pop('ingredient_recipes')
         tags = validated_data.pop('tags')
         instance.tags.set(tags)
-        for ingredient in ingredients_data:
-            ingredient_id = ingredient['ingredient']['id']
-
-            amount = ingredient['amount']
-
-            ingredient = Ingredient.objects.get(id=ingredient_id)
-            existing_ingredient_recipe = IngredientRecipe.objects.filter(
-                recipe=instance, ingredient=ingredient
-            ).first()
-            if existing_ingredient_recipe:
-                existing_ingredient_recipe.amount = amount
-                existing_ingredient_recipe.save()
+        existing = {
+            ingredient_recipe.ingredient_id: ingredient_recipe
+            for ingredient_recipe in instance.ingredient_recipes.all()
+        }
+        to_update = []
+        to_create = []
+        for ingredient_data in ingredients_data:
+            ingredient = ingredient_data['ingredient']
+            amount = ingredient_data['amount']
+            ingredient_recipe = existing.get(ingredient.id)
+            if ingredient_recipe:
+                ingredient_recipe.amount = amount
+                to_update.append(ingredient_recipe)
             else:
-                IngredientRecipe.objects.create(
+                to_create.append(IngredientRecipe(
                     recipe=instance,
                     ingredient=ingredient,
                     amount=amount
-                )
-        instance.save()
+                ))
+        IngredientRecipe.objects.bulk_update(to_update, ['amount'])
+        IngredientRecipe.objects.bulk_create(to_create)
+        instance.save(update_fields=['name', 'text', 'cooking_time', 'image'])
+        refresh_recipe_indexes([instance.id])
         return instance
 
 
@@ -321,9 +371,37 @@ class RecipeSerializer(RecipeBaseSerializer):
 
     class Meta(RecipeBaseSerializer.Meta):
         fields = RecipeBaseSerializer.Meta.fields + (
-            'id', 'author', 'is_favorited', 'is_in_shopping_cart'
+            'id', 'author', 'is_favorited', 'is_in_shopping_cart',
+            'views_count'
         )
-        read_only_fields = ('author', 'is_favorited', 'is_in_shopping_cart')
+        read_only_fields = (
+            'author', 'is_favorited', 'is_in_shopping_cart', 'views_count'
+        )
+
+    def get_fields(self):
+        """Поля ответа с учётом ``?fields=`` и ``?expand=``.
+
+        Невложенные связи отдаются идентификаторами.
+        """
+        fields = super().get_fields()
+        sparse_fields = self.context.get('sparse_fields')
+        if sparse_fields is None:
+            return fields
+        selected, expand = sparse_fields
+        fields = {name: fields[name] for name in selected}
+        if 'author' in fields and 'author' not in expand:
+            fields['author'] = serializers.PrimaryKeyRelatedField(
+                read_only=True
+            )
+        if 'tags' in fields and 'tags' not in expand:
+            fields['tags'] = serializers.PrimaryKeyRelatedField(
+                read_only=True, many=True
+            )
+        if 'ingredients' in fields and 'ingredients' not in expand:
+            fields['ingredients'] = IngredientAmountSerializer(
+                source='ingredient_recipes', read_only=True, many=True
+            )
+        return fields
 
     def get_is_favorited(self, obj):
         user = self.context.get('request').user
@@ -338,6 +416,164 @@ class RecipeSerializer(RecipeBaseSerializer):
         return ShoppingCart.objects.filter(user=user, recipe=obj).exists()
 
 
+class RecipeCookableSerializer(RecipeSerializer):
+    """Сериализатор рецептов с количеством недостающих ингредиентов."""
+
+    missing_count = serializers.IntegerField(read_only=True)
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('missing_count', )
+
+
+class CookableQuerySerializer(serializers.Serializer):
+    """Параметры поиска рецептов по имеющимся ингредиентам."""
+
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_AVAILABLE_INGREDIENTS,
+        error_messages={
+            'min_length': 'Укажите хотя бы один ингредиент.',
+            'max_length': (
+                'Максимальное количество ингредиентов: '
+                f'{MAX_AVAILABLE_INGREDIENTS}.'
+            ),
+        }
+    )
+    max_missing = serializers.IntegerField(
+        required=False,
+        min_value=0,
+        max_value=MAX_MISSING_INGREDIENTS,
+        default=MAX_MISSING_INGREDIENTS,
+        error_messages={
+            'min_value': 'Минимальное количество недостающих: 0.',
+            'max_value': (
+                'Максимальное количество недостающих: '
+                f'{MAX_MISSING_INGREDIENTS}.'
+            ),
+        }
+    )
+
+
+class SimilarQuerySerializer(serializers.Serializer):
+    """Параметры запроса похожих рецептов."""
+
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_SIMILAR_RECIPES_LIMIT,
+        default=SIMILAR_RECIPES_LIMIT,
+        error_messages={
+            'min_value': 'Минимальное количество рецептов: 1.',
+            'max_value': (
+                'Максимальное количество рецептов: '
+                f'{MAX_SIMILAR_RECIPES_LIMIT}.'
+            ),
+        }
+    )
+
+
+class SparseFieldsQuerySerializer(serializers.Serializer):
+    """Параметры ``?fields=`` и ``?expand=`` для ответов с рецептами.
+
+    Если указан хотя бы один параметр, связи вкладываются только
+    из ``expand``, остальные отдаются идентификаторами.
+    """
+
+    fields = serializers.CharField(required=False)
+    expand = serializers.CharField(required=False, allow_blank=True)
+
+    def split(self, value, allowed):
+        names = [name.strip() for name in value.split(',') if name.strip()]
+        unknown = [name for name in names if name not in allowed]
+        if unknown:
+            raise serializers.ValidationError(
+                f"Неизвестные поля: {', '.join(unknown)}."
+            )
+        return set(names)
+
+    def validate_fields(self, value):
+        allowed = RecipeSerializer.Meta.fields
+        names = self.split(value, allowed)
+        if not names:
+            raise serializers.ValidationError(
+                "Укажите хотя бы одно поле."
+            )
+        return tuple(name for name in allowed if name in names)
+
+    def validate_expand(self, value):
+        return frozenset(self.split(value, EXPANDABLE_RECIPE_FIELDS))
+
+    def to_sparse_fields(self):
+        """Пара (поля, вложенные связи) или ``None`` для полного ответа."""
+        data = self.validated_data
+        if not data:
+            return None
+        return (
+            data.get('fields', RecipeSerializer.Meta.fields),
+            data.get('expand', frozenset())
+        )
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список идентификаторов рецептов для пакетных операций."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_BATCH_RECIPES,
+        error_messages={
+            'min_length': 'Укажите хотя бы один рецепт.',
+            'max_length': (
+                f'Максимальное количество рецептов: {MAX_BATCH_RECIPES}.'
+            ),
+        }
+    )
+
+    def validate_ids(self, value):
+        return list(dict.fromkeys(value))
+
+
+class CommaSeparatedListField(serializers.ListField):
+    """Список, значения которого можно передать через запятую."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = [data]
+        if isinstance(data, list) and all(
+            isinstance(item, str) for item in data
+        ):
+            data = [
+                item.strip()
+                for value in data
+                for item in value.split(',')
+                if item.strip()
+            ]
+        return super().to_internal_value(data)
+
+
+class RecipeIdsQuerySerializer(RecipeIdsSerializer):
+    """Идентификаторы рецептов из ``?ids=1,2,3``."""
+
+    ids = CommaSeparatedListField(
+        child=serializers.IntegerField(min_value=1),
+        min_length=1,
+        max_length=MAX_BATCH_RECIPES,
+        error_messages={
+            'min_length': 'Укажите хотя бы один рецепт.',
+            'max_length': (
+                f'Максимальное количество рецептов: {MAX_BATCH_RECIPES}.'
+            ),
+        }
+    )
+
+
+class SyncQuerySerializer(serializers.Serializer):
+    """Параметры запроса изменений для синхронизации."""
+
+    since = serializers.IntegerField(required=False, min_value=0)
+
+
 class RecipeShortSerializer(RecipeBaseSerializer):
     """Сериализатор для краткой информации о рецепте."""
     class Meta(RecipeBaseSerializer.Meta):
@@ -1,5 +1,94 @@
-from django.db.models import Sum
-from recipe.models import IngredientRecipe, ShoppingCart
+import numpy as np
+from django.db import connections, router
+from django.db.models import Exists, OuterRef, Sum
+from django.db.models.expressions import RawSQL
+from recipe.constants import SIMILAR_MAX_CANDIDATES
+from recipe.models import (ChangeLog, Favorite, Follow, IngredientRecipe,
+                           Recipe, RecipeSignature, ShoppingCart)
+from recipe.services import record_changes
+from recipe.similarity import signatures_from_bytes, similarity_scores
+
+from .constants import MAX_COOKABLE_RECIPES
+
+MISSING_INGREDIENTS_SQL = (
+    'SELECT COUNT(*) FROM unnest({table}.ingredient_ids) AS ingredient_id '
+    'WHERE ingredient_id <> ALL(%s)'
+).format(table=Recipe._meta.db_table)
+
+SHARED_BANDS_SQL = (
+    'SELECT COUNT(*) FROM unnest({table}.bands) AS band '
+    'WHERE band = ANY(%s)'
+).format(table=RecipeSignature._meta.db_table)
+
+ADD_RECIPES_SQL = (
+    'WITH existing AS ({recipes}), added AS ('
+    'INSERT INTO {table} ({user_column}, {recipe_column}) '
+    'SELECT %s, id FROM existing ON CONFLICT DO NOTHING '
+    'RETURNING {recipe_column}) '
+    'SELECT existing.id, added.{recipe_column} IS NOT NULL '
+    'FROM existing LEFT JOIN added ON added.{recipe_column} = existing.id'
+)
+
+
+def insert_ignore(model, **values):
+    """Добавляет строку одним запросом ``INSERT ... ON CONFLICT DO NOTHING``.
+
+    Возвращает ``True``, если строка добавлена, и ``False``, если она
+    уже существовала.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in values]
+    sql = (
+        'INSERT INTO {table} ({columns}) VALUES ({params}) '
+        'ON CONFLICT DO NOTHING'
+    ).format(
+        table=quote_name(model._meta.db_table),
+        columns=', '.join(quote_name(field.column) for field in fields),
+        params=', '.join(['%s'] * len(fields))
+    )
+    params = [
+        field.get_db_prep_save(value, connection)
+        for field, value in zip(fields, values.values())
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount == 1
+
+
+def delete_returning(model, returning=None, **filters):
+    """Удаляет строки одним запросом ``DELETE ... RETURNING``.
+
+    Значение фильтра-список сравнивается через ``= ANY``. Возвращает
+    значения поля ``returning`` удалённых строк, по умолчанию первичные
+    ключи.
+    """
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in filters]
+    returning_field = (
+        model._meta.pk if returning is None
+        else model._meta.get_field(returning)
+    )
+    conditions = []
+    params = []
+    for field, value in zip(fields, filters.values()):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            conditions.append(f'{quote_name(field.column)} = ANY(%s)')
+            params.append([
+                field.get_db_prep_value(item, connection) for item in value
+            ])
+        else:
+            conditions.append(f'{quote_name(field.column)} = %s')
+            params.append(field.get_db_prep_value(value, connection))
+    sql = 'DELETE FROM {table} WHERE {conditions} RETURNING {column}'.format(
+        table=quote_name(model._meta.db_table),
+        conditions=' AND '.join(conditions),
+        column=quote_name(returning_field.column)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
 
 
 def get_shopping_cart_ingredients(request):
@@ -21,3 +110,172 @@ def get_shopping_cart_ingredients(request):
         }
         for ingredient in ingredients
     ]
+
+
+def get_cookable_recipes(queryset, ingredient_ids, max_missing):
+    """Рецепты, которые можно приготовить из имеющихся ингредиентов.
+
+    Кандидаты отбираются по GIN-индексу ``ingredient_ids`` и по длине
+    массива: в рецепте не может быть больше ингредиентов, чем имеется
+    плюс ``max_missing``. Недостающие ингредиенты считаются только для
+    оставшихся кандидатов. Возвращает до ``MAX_COOKABLE_RECIPES`` пар
+    из идентификатора рецепта и числа недостающих ингредиентов.
+    """
+    ingredient_ids = sorted(set(ingredient_ids))
+    return list(
+        queryset.filter(
+            ingredient_ids__overlap=ingredient_ids,
+            ingredient_ids__len__lte=len(ingredient_ids) + max_missing
+        ).annotate(
+            missing_count=RawSQL(MISSING_INGREDIENTS_SQL, (ingredient_ids, ))
+        ).filter(
+            missing_count__lte=max_missing
+        ).order_by(
+            'missing_count', '-created', 'id'
+        ).values_list('id', 'missing_count')[:MAX_COOKABLE_RECIPES]
+    )
+
+
+def get_similar_recipes(recipe, limit):
+    """Похожие рецепты по MinHash/LSH-сигнатурам ингредиентов и тегам.
+
+    Кандидаты с общими LSH-полосами ранжируются по числу общих полос,
+    и точная оценка выполняется только для ``SIMILAR_MAX_CANDIDATES``
+    лучших из них.
+    """
+    signature = RecipeSignature.objects.filter(recipe=recipe).first()
+    if signature is None:
+        return []
+    candidates = list(
+        RecipeSignature.objects.filter(
+            bands__overlap=signature.bands
+        ).exclude(
+            recipe=recipe
+        ).annotate(
+            shared_bands=RawSQL(SHARED_BANDS_SQL, (signature.bands, ))
+        ).order_by(
+            '-shared_bands', 'recipe_id'
+        ).values_list('recipe_id', 'signature')[:SIMILAR_MAX_CANDIDATES]
+    )
+    if not candidates:
+        return []
+    candidate_ids, blobs = zip(*candidates)
+    tags = {recipe_id: [] for recipe_id in (recipe.id, ) + candidate_ids}
+    for recipe_id, tag_id in Recipe.tags.through.objects.filter(
+        recipe_id__in=tags
+    ).values_list('recipe_id', 'tag_id'):
+        tags[recipe_id].append(tag_id)
+    scores = similarity_scores(
+        signatures_from_bytes([signature.signature])[0],
+        tags[recipe.id],
+        signatures_from_bytes(blobs),
+        [tags[recipe_id] for recipe_id in candidate_ids]
+    )
+    best_ids = [
+        candidate_ids[index] for index in np.argsort(-scores, kind='stable')
+    ][:limit]
+    recipes = Recipe.objects.in_bulk(best_ids)
+    return [
+        recipes[recipe_id] for recipe_id in best_ids if recipe_id in recipes
+    ]
+
+
+def insert_recipes_returning(model, user_id, recipe_ids):
+    """Добавляет пользователю рецепты одним запросом ``INSERT ... SELECT``.
+
+    Строки добавляются только для существующих рецептов, уже добавленные
+    пропускаются через ``ON CONFLICT DO NOTHING``. Возвращает словарь
+    существующих рецептов: ``True`` для добавленных этим запросом,
+    ``False`` для добавленных раньше, в том числе одновременным запросом.
+    """
+    if not recipe_ids:
+        return {}
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    recipes, recipe_params = Recipe.objects.filter(
+        id__in=recipe_ids
+    ).values('id').query.get_compiler(connection=connection).as_sql()
+    sql = ADD_RECIPES_SQL.format(
+        recipes=recipes,
+        table=quote_name(model._meta.db_table),
+        user_column=quote_name(model._meta.get_field('user').column),
+        recipe_column=quote_name(model._meta.get_field('recipe').column)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [*recipe_params, user_id])
+        return dict(cursor.fetchall())
+
+
+def add_recipes(model, user, recipe_ids):
+    """Пакетное добавление рецептов в избранное или список покупок.
+
+    Статус и записи журнала изменений определяются по строкам, которые
+    действительно вставил запрос, поэтому одновременные пакеты не
+    записывают одно добавление дважды.
+    """
+    existing = insert_recipes_returning(model, user.id, recipe_ids)
+    record_changes(
+        model,
+        ChangeLog.CREATED,
+        [recipe_id for recipe_id, added in existing.items() if added],
+        user.id
+    )
+    return [
+        {
+            'id': recipe_id,
+            'status': (
+                'not_found' if recipe_id not in existing
+                else 'added' if existing[recipe_id]
+                else 'already_added'
+            )
+        }
+        for recipe_id in recipe_ids
+    ]
+
+
+def remove_recipes(model, user, recipe_ids):
+    """Пакетное удаление рецептов из избранного или списка покупок."""
+    removed = set(delete_returning(
+        model, returning='recipe_id', user_id=user.id, recipe_id=recipe_ids
+    ))
+    record_changes(model, ChangeLog.DELETED, removed, user.id)
+    return [
+        {
+            'id': recipe_id,
+            'status': 'removed' if recipe_id in removed else 'not_found'
+        }
+        for recipe_id in recipe_ids
+    ]
+
+
+def get_recipe_overlay(recipe_id, user):
+    """Автор, дата изменения, просмотры и флаги рецепта одним запросом.
+
+    Возвращает ``None``, если рецепт не найден.
+    """
+    queryset = Recipe.objects.filter(id=recipe_id)
+    if not user.is_authenticated:
+        overlay = queryset.values(
+            'author_id', 'updated', 'views_count'
+        ).first()
+        if overlay is not None:
+            overlay.update(
+                is_favorited=False,
+                is_in_shopping_cart=False,
+                is_subscribed=False
+            )
+        return overlay
+    return queryset.annotate(
+        is_favorited=Exists(
+            Favorite.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_in_shopping_cart=Exists(
+            ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+        ),
+        is_subscribed=Exists(
+            Follow.objects.filter(user=user, following=OuterRef('author'))
+        )
+    ).values(
+        'author_id', 'updated', 'views_count', 'is_favorited',
+        'is_in_shopping_cart', 'is_subscribed'
+    ).first()
@@ -0,0 +1,105 @@
+from django.contrib.auth import get_user_model, user_logged_out
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipe.models import Follow, Ingredient, IngredientRecipe, Recipe, Tag
+from recipe.services import recipes_deleted, users_deleted
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .cache import (author_scopes, bump_versions, invalidate_following_ids,
+                    recipe_scopes)
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    """Сбрасывает кеш аутентификации при удалении токена."""
+    invalidate_token(instance.key)
+
+
+@receiver(user_logged_out)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, user=None, instance=None, **kwargs):
+    """Сбрасывает кеш аутентификации при выходе и изменении пользователя."""
+    user = user or instance
+    if user is not None:
+        invalidate_user_tokens(user.pk)
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    """Инвалидирует кеш рецептов при изменении рецепта."""
+    bump_versions(*recipe_scopes(instance.author_id, instance.pk))
+
+
+@receiver(recipes_deleted)
+def recipes_soft_deleted(sender, recipes, **kwargs):
+    """Инвалидирует кеш рецептов, помеченных удалёнными."""
+    scopes = set()
+    for recipe_id, author_id in recipes:
+        scopes.update(recipe_scopes(author_id, recipe_id))
+    bump_versions(*scopes)
+
+
+@receiver(users_deleted)
+def users_soft_deleted(sender, user_ids, **kwargs):
+    """Удаляет токены и сбрасывает кеш удалённых пользователей."""
+    Token.objects.filter(user_id__in=user_ids).delete()
+    scopes = set()
+    for user_id in user_ids:
+        invalidate_user_tokens(user_id)
+        scopes.update(author_scopes(user_id))
+    bump_versions(*scopes)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, **kwargs):
+    """Инвалидирует кеш рецептов при изменении тегов рецепта."""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        bump_versions('recipes', 'tags')
+    else:
+        bump_versions(*recipe_scopes(instance.author_id, instance.pk))
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def recipe_ingredients_changed(sender, instance, **kwargs):
+    """Инвалидирует кеш рецептов при изменении ингредиентов рецепта."""
+    author_id = Recipe.objects.filter(
+        id=instance.recipe_id
+    ).values_list('author_id', flat=True).first()
+    if author_id is not None:
+        bump_versions(*recipe_scopes(author_id, instance.recipe_id))
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def tag_changed(sender, **kwargs):
+    bump_versions('tags')
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    bump_versions('ingredients')
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, update_fields=None, **kwargs):
+    """Инвалидирует кеш рецептов при изменении профиля автора."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    if instance.recipes.exists():
+        bump_versions(*author_scopes(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def follow_changed(sender, instance, **kwargs):
+    """Сбрасывает кеш подписок пользователя."""
+    invalidate_following_ids(instance.user_id)
@@ -0,0 +1,178 @@
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.db import DEFAULT_DB_ALIAS, router
+from django.test import SimpleTestCase, TestCase, override_settings
+from recipe.models import (Favorite, Follow, Ingredient, IngredientRecipe,
+                           Recipe, ShoppingCart, Tag)
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from backend.routers import allow_replica_reads
+
+from .cache import get_or_build
+from .fast_serializers import FastRecipeSerializer
+from .renderers import ORJSONRenderer
+from .serializers import RecipeSerializer, SparseFieldsQuerySerializer
+
+User = get_user_model()
+
+
+class FastRecipeSerializerTest(TestCase):
+    """Быстрая сериализация совпадает с ``RecipeSerializer``."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.org', username='author',
+            first_name='Автор', last_name='Рецептов', password='password',
+            avatar='users/author.png'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.org', username='reader',
+            first_name='Читатель', last_name='Рецептов', password='password'
+        )
+        tags = [
+            Tag.objects.create(name=f'Тег {number}', slug=f'tag-{number}')
+            for number in range(3)
+        ]
+        ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {number}', measurement_unit='г'
+            )
+            for number in range(4)
+        ]
+        cls.recipes = []
+        for number in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.author,
+                name=f'Рецепт {number}',
+                text='Описание\u2028с разделителем строк',
+                image=f'recipes/images/{number}.png',
+                cooking_time=number + 1
+            )
+            recipe.tags.set(tags[number:])
+            for ingredient in ingredients[number:]:
+                IngredientRecipe.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=number + 10
+                )
+            cls.recipes.append(recipe)
+        Favorite.objects.create(user=cls.reader, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.reader, recipe=cls.recipes[1])
+        Follow.objects.create(user=cls.reader, following=cls.author)
+
+    def get_context(self, user, query=None):
+        request = Request(APIRequestFactory().get('/api/recipes/', query))
+        request.user = user
+        params = SparseFieldsQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        return {
+            'request': request,
+            'sparse_fields': params.to_sparse_fields()
+        }
+
+    def assert_same_data(self, user, query=None):
+        recipe_ids = [recipe.id for recipe in reversed(self.recipes)]
+        expected = RecipeSerializer(
+            Recipe.objects.in_bulk(recipe_ids).values(),
+            many=True,
+            context=self.get_context(user, query)
+        ).data
+        expected = sorted(expected, key=lambda item: -item['id'])
+        data = FastRecipeSerializer(
+            recipe_ids, context=self.get_context(user, query)
+        ).data
+        self.assertEqual(
+            ORJSONRenderer().render(data), JSONRenderer().render(expected)
+        )
+
+    def test_full_anonymous(self):
+        self.assert_same_data(AnonymousUser())
+
+    def test_full_authenticated(self):
+        self.assert_same_data(self.reader)
+
+    def test_sparse_anonymous(self):
+        self.assert_same_data(
+            AnonymousUser(), {'fields': 'id,name,author,tags,ingredients'}
+        )
+
+    def test_sparse_authenticated(self):
+        self.assert_same_data(
+            self.reader,
+            {
+                'fields': 'id,author,tags,ingredients,is_favorited',
+                'expand': 'author,ingredients'
+            }
+        )
+
+    def test_missing_recipes_skipped(self):
+        data = FastRecipeSerializer(
+            [self.recipes[0].id, 0], context=self.get_context(self.reader)
+        ).data
+        self.assertEqual([item['id'] for item in data], [self.recipes[0].id])
+
+
+class ORJSONRendererTest(TestCase):
+    """``ORJSONRenderer`` выдаёт те же байты, что и ``JSONRenderer``."""
+
+    payloads = (
+        {'results': [], 'count': 0, 'next': None},
+        {'name': 'Рецепт', 'text': 'Строка\u2028и абзац\u2029', 'ok': True},
+        {'amount': Decimal('1.50'), 'ids': [1, 2, 3], 1: 'ключ-число'},
+        [{'nested': {'list': [None, False, -7]}}],
+    )
+
+    def test_same_bytes(self):
+        for data in self.payloads:
+            with self.subTest(data=data):
+                self.assertEqual(
+                    ORJSONRenderer().render(data),
+                    JSONRenderer().render(data)
+                )
+
+    def test_floats_same_values(self):
+        """Числа с плавающей точкой могут записываться иначе."""
+        data = {'values': [0.1, 1e20, 1e-7, 2.5]}
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data))
+        )
+
+    def test_indent_uses_json_renderer(self):
+        data = {'name': 'Рецепт'}
+        self.assertEqual(
+            ORJSONRenderer().render(
+                data, 'application/json; indent=2'
+            ),
+            JSONRenderer().render(data, 'application/json; indent=2')
+        )
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+@mock.patch('backend.routers.is_healthy', return_value=True)
+class CacheBuilderRoutingTest(SimpleTestCase):
+    """Значения кеша строятся по основной базе, а не по реплике."""
+
+    def build(self, key):
+        with allow_replica_reads():
+            self.assertEqual(router.db_for_read(Recipe), 'replica')
+            return get_or_build(
+                key, lambda: router.db_for_read(Recipe), ttl=60
+            )
+
+    def test_builder_reads_primary(self, is_healthy):
+        self.assertEqual(
+            self.build('tests:routing:build'), DEFAULT_DB_ALIAS
+        )
+
+    def test_builder_without_lock_reads_primary(self, is_healthy):
+        with mock.patch('api.cache.cache.add', return_value=False), \
+                mock.patch('api.cache.CACHE_LOCK_WAIT', 0):
+            self.assertEqual(
+                self.build('tests:routing:wait'), DEFAULT_DB_ALIAS
+            )
@@ -1,25 +1,49 @@
 import csv
+import os
+from functools import partial
 from urllib.parse import urljoin
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse
+from django.db.models import Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from recipe.models import (Favorite, Follow, Ingredient, Recipe, ShoppingCart,
-                           ShortLink, Tag)
+from jobs.services import enqueue
+from recipe.counters import view_counter
+from recipe.models import (ChangeLog, Favorite, Follow, Ingredient, Recipe,
+                           ShoppingCart, ShortLink, Tag)
+from recipe.services import (backfill_feed, get_changes, get_feed_keys,
+                             get_or_create_short_link, purge_feed,
+                             record_changes, soft_delete_recipes,
+                             soft_delete_users)
 from rest_framework import mixins, permissions, status, viewsets
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 
+from backend.postgresql.base import get_pool_stats
+
+from .cache import (anonymous_list_cache_key, get_or_build,
+                    invalidate_following_ids, make_etag, not_modified,
+                    query_cache_key, recipe_detail_cache_key, set_validators)
+from .constants import EXPANDABLE_RECIPE_FIELDS
+from .fast_serializers import FastRecipeSerializer, prune_recipe
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import CustomPagination
+from .pagination import CustomPagination, FeedPagination
 from .permissions import IsAnonymous, IsAuthor
-from .serializers import (IngredientSerializer, RecipeCreateUpdateSerializer,
+from .serializers import (CookableQuerySerializer, IngredientSerializer,
+                          RecipeCookableSerializer,
+                          RecipeCreateUpdateSerializer,
+                          RecipeIdsQuerySerializer, RecipeIdsSerializer,
                           RecipeListFollowSerializer, RecipeSerializer,
-                          RecipeShortSerializer, TagSerializer,
-                          UserAvatarSerializer, UserFollowSerializer)
-from .services import get_shopping_cart_ingredients
+                          RecipeShortSerializer, SimilarQuerySerializer,
+                          SparseFieldsQuerySerializer, SyncQuerySerializer,
+                          TagSerializer, UserAvatarSerializer,
+                          UserFollowSerializer)
+from .services import (add_recipes, delete_returning, get_cookable_recipes,
+                       get_recipe_overlay, get_shopping_cart_ingredients,
+                       get_similar_recipes, insert_ignore, remove_recipes)
 
 User = get_user_model()
 
@@ -34,10 +58,28 @@ def redirect_short_link(request, short_code):
     return redirect(original_link)
 
 
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def sync_changes(request):
+    """Изменения каталогов и данных пользователя после токена ``since``."""
+    serializer = SyncQuerySerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    return Response(get_changes(
+        request.user, serializer.validated_data.get('since')
+    ))
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def database_pool_stats(request):
+    """Статистика пулов соединений процесса, обработавшего запрос."""
+    return Response({'pid': os.getpid(), 'pools': get_pool_stats()})
+
+
 class CustomUserViewSet(UserViewSet):
     """Представление для добавления и удаления аватара пользоввателя."""
 
-    queryset = User.objects.all()
+    queryset = User.objects.filter(deleted_at__isnull=True)
     pagination_class = CustomPagination
     permission_classes = (
         permissions.IsAdminUser | permissions.IsAuthenticated,
@@ -48,6 +90,9 @@ class CustomUserViewSet(UserViewSet):
             self.permission_classes = [IsAnonymous, ]
         return super().get_permissions()
 
+    def perform_destroy(self, instance):
+        soft_delete_users([instance.id])
+
     @action(
         methods=['put', 'delete'],
         detail=False,
@@ -60,15 +105,18 @@ class CustomUserViewSet(UserViewSet):
         if request.method == 'PUT':
             serializer = self.get_serializer(data=request.data)
             serializer.is_valid(raise_exception=True)
+            old_avatar = user.avatar.name
             user.avatar = serializer.validated_data.get('avatar')
             user.save()
+            if old_avatar and old_avatar != user.avatar.name:
+                enqueue('jobs.delete_files', names=[old_avatar])
             response_serializer = self.get_serializer(user)
             return Response(
                 response_serializer.data, status=status.HTTP_200_OK
             )
         elif request.method == 'DELETE':
             if user.avatar:
-                user.avatar.delete()
+                enqueue('jobs.delete_files', names=[user.avatar.name])
                 user.avatar = None
                 user.save()
                 return Response(status=status.HTTP_204_NO_CONTENT)
@@ -86,8 +134,8 @@ class CustomUserViewSet(UserViewSet):
     def user_subscribe(self, request, id):
         """Подписаться на пользователя/удалить подписку."""
         user = request.user
-        user_to_subscribe = get_object_or_404(User, id=id)
         if request.method == 'POST':
+            user_to_subscribe = get_object_or_404(User, id=id)
             serializer = RecipeListFollowSerializer(
                 data=request.query_params,
                 context={
@@ -95,36 +143,43 @@ class CustomUserViewSet(UserViewSet):
                     'user_to_subscribe': user_to_subscribe
                 }
             )
-            if serializer.is_valid():
-                recipes_limit = serializer.validated_data.get('recipes_limit')
-                Follow.objects.create(user=user, following=user_to_subscribe)
-                serializer = UserFollowSerializer(
-                    user_to_subscribe,
-                    context={
-                        'request': request,
-                        'recipes_limit': recipes_limit
-                    }
-                )
+            if not serializer.is_valid():
                 return Response(
-                    serializer.data, status=status.HTTP_201_CREATED
+                    serializer.errors, status=status.HTTP_400_BAD_REQUEST
                 )
-            return Response(
-                serializer.errors, status=status.HTTP_400_BAD_REQUEST
-            )
-        elif request.method == 'DELETE':
-            subscription_exists = Follow.objects.filter(
-                user=user, following=user_to_subscribe
-            ).exists()
-
-            if not subscription_exists:
+            if not insert_ignore(
+                Follow, user_id=user.id, following_id=user_to_subscribe.id
+            ):
                 return Response(
-                    {'detail': 'Вы не подписаны на этого пользователя.'},
+                    {'detail': ['Вы уже подписаны на этого пользователя']},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            Follow.objects.filter(
-                user=user, following=user_to_subscribe
-            ).delete()
-            return Response(status=status.HTTP_204_NO_CONTENT)
+            record_changes(
+                Follow, ChangeLog.CREATED, [user_to_subscribe.id], user.id
+            )
+            invalidate_following_ids(user.id, request)
+            backfill_feed(user.id, user_to_subscribe.id)
+            serializer = UserFollowSerializer(
+                user_to_subscribe,
+                context={
+                    'request': request,
+                    'recipes_limit': serializer.validated_data.get(
+                        'recipes_limit'
+                    )
+                }
+            )
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        elif request.method == 'DELETE':
+            if delete_returning(Follow, user_id=user.id, following_id=id):
+                record_changes(Follow, ChangeLog.DELETED, [int(id)], user.id)
+                invalidate_following_ids(user.id, request)
+                purge_feed(user.id, id)
+                return Response(status=status.HTTP_204_NO_CONTENT)
+            get_object_or_404(User, id=id)
+            return Response(
+                {'detail': 'Вы не подписаны на этого пользователя.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
     @action(
         methods=['get'],
@@ -171,7 +226,29 @@ class CustomUserViewSet(UserViewSet):
         )
 
 
-class IngredientViewSet(mixins.ListModelMixin,
+class CachedListMixin:
+    """Кеширует список до изменения областей кеша ``cache_scopes``.
+
+    Ответ не должен зависеть от пользователя запроса.
+    """
+    cache_scopes = ()
+
+    def list(self, request, *args, **kwargs):
+        key = query_cache_key(
+            f'{self.basename}:list', self.cache_scopes, request.query_params
+        )
+        data = get_or_build(
+            key,
+            lambda: super(CachedListMixin, self).list(
+                request, *args, **kwargs
+            ).data,
+            settings.REFERENCE_LIST_CACHE_TTL
+        )
+        return Response(data)
+
+
+class IngredientViewSet(CachedListMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         viewsets.GenericViewSet):
     """Получение ингредиентов."""
@@ -180,15 +257,18 @@ class IngredientViewSet(mixins.ListModelMixin,
     permission_classes = (permissions.AllowAny, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = IngredientFilter
+    cache_scopes = ('ingredients', )
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(CachedListMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  viewsets.GenericViewSet):
     """Получение тэгов."""
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (permissions.AllowAny, )
+    cache_scopes = ('tags', )
 
 
 class RecipeViewSet(viewsets.ModelViewSet):
@@ -204,8 +284,48 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeCreateUpdateSerializer
         return super().get_serializer_class()
 
+    def get_sparse_fields(self):
+        """Поля из ``?fields=`` и ``?expand=`` для чтения рецептов."""
+        if self.action not in ('list', 'retrieve', 'feed'):
+            return None
+        if not hasattr(self, '_sparse_fields'):
+            serializer = SparseFieldsQuerySerializer(
+                data=self.request.query_params
+            )
+            serializer.is_valid(raise_exception=True)
+            self._sparse_fields = serializer.to_sparse_fields()
+        return self._sparse_fields
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['sparse_fields'] = self.get_sparse_fields()
+        return context
+
+    def get_queryset(self):
+        """Рецепты с подгрузкой только тех связей, что попадут в ответ."""
+        queryset = super().get_queryset()
+        if self.action not in ('list', 'retrieve', 'cookable_recipes'):
+            return queryset
+        fields, expand = self.get_sparse_fields() or (
+            RecipeSerializer.Meta.fields, EXPANDABLE_RECIPE_FIELDS
+        )
+        if 'author' in fields and 'author' in expand:
+            queryset = queryset.select_related('author')
+        if 'tags' in fields:
+            queryset = queryset.prefetch_related('tags')
+        if 'ingredients' in fields:
+            queryset = queryset.prefetch_related(
+                'ingredient_recipes__ingredient'
+                if 'ingredients' in expand else 'ingredient_recipes'
+            )
+        if 'text' not in fields:
+            queryset = queryset.defer('text')
+        return queryset
+
     def get_permissions(self):
-        if self.request.method == 'POST':
+        if self.action == 'feed':
+            permission_classes = [permissions.IsAuthenticated]
+        elif self.request.method == 'POST':
             permission_classes = [
                 permissions.IsAuthenticated | permissions.IsAdminUser,
             ]
@@ -215,22 +335,200 @@ class RecipeViewSet(viewsets.ModelViewSet):
             permission_classes = [IsAnonymous, ]
         return [permission() for permission in permission_classes]
 
+    def list(self, request, *args, **kwargs):
+        """Список рецептов с ETag и ответом 304 для неизменённых страниц.
+
+        Страницы для анонимных пользователей кешируются вместе с ETag
+        и датой последнего изменения рецептов страницы.
+        С параметром ``ids`` возвращает указанные рецепты.
+        """
+        if 'ids' in request.query_params:
+            data, last_modified = self.get_multi_get_data(request)
+            return self.get_validated_response(
+                request, data, make_etag(data), last_modified
+            )
+        cache_key = anonymous_list_cache_key(request)
+        if cache_key is None:
+            data, last_modified = self.get_list_data(request)
+            return self.get_validated_response(
+                request, data, make_etag(data), last_modified
+            )
+        data, data_etag, last_modified = get_or_build(
+            cache_key,
+            lambda: self.with_etag(*self.get_list_data(request)),
+            settings.RECIPE_LIST_CACHE_TTL
+        )
+        return self.get_validated_response(
+            request, data, data_etag, last_modified
+        )
+
+    @staticmethod
+    def with_etag(data, last_modified):
+        return data, make_etag(data), last_modified
+
+    def get_validated_response(self, request, data, version,
+                               last_modified=None):
+        """Ответ с валидаторами кеша или 304, если у клиента он актуален.
+
+        ``version`` однозначно определяет тело ответа. ``data`` может быть
+        функцией: тогда тело строится только при отсутствии актуальной
+        копии у клиента.
+        """
+        etag = make_etag(version, request.accepted_renderer.format)
+        if not_modified(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(data() if callable(data) else data)
+        return set_validators(response, request, etag, last_modified)
+
+    def get_list_data(self, request):
+        """Страница списка и дата последнего изменения её рецептов.
+
+        Без ``RECIPE_FAST_READ_PATH`` рецепты сериализуются
+        ``RecipeSerializer``, иначе быстрой сериализацией только для
+        чтения.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        if not settings.RECIPE_FAST_READ_PATH:
+            page = self.paginate_queryset(queryset)
+            recipes = queryset if page is None else page
+            data = self.get_serializer(recipes, many=True).data
+            last_modified = max(
+                (recipe.updated for recipe in recipes), default=None
+            )
+        else:
+            recipes = queryset.values_list('id', 'updated')
+            page = self.paginate_queryset(recipes)
+            if page is None:
+                page = list(recipes)
+            data = FastRecipeSerializer(
+                [recipe_id for recipe_id, _ in page],
+                context=self.get_serializer_context()
+            ).data
+            last_modified = max(
+                (updated for _, updated in page), default=None
+            )
+        if self.paginator is None:
+            return data, last_modified
+        return self.get_paginated_response(data).data, last_modified
+
+    def get_multi_get_data(self, request):
+        """Рецепты по списку идентификаторов в порядке запроса.
+
+        Несуществующие рецепты пропускаются. Возвращает тело ответа
+        и дату последнего изменения найденных рецептов.
+        """
+        serializer = RecipeIdsQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['ids']
+        if settings.RECIPE_FAST_READ_PATH:
+            data = FastRecipeSerializer(
+                recipe_ids, context=self.get_serializer_context()
+            ).data
+            last_modified = Recipe.objects.filter(
+                id__in=recipe_ids
+            ).aggregate(last_modified=Max('updated'))['last_modified']
+        else:
+            recipes = self.get_queryset().in_bulk(recipe_ids)
+            data = self.get_serializer(
+                [recipes[pk] for pk in recipe_ids if pk in recipes],
+                many=True
+            ).data
+            last_modified = max(
+                (recipe.updated for recipe in recipes.values()),
+                default=None
+            )
+        return {'results': data}, last_modified
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт из кеша с пользовательскими флагами поверх него.
+
+        Не зависящая от пользователя часть ответа кешируется по версии
+        рецепта, флаги текущего пользователя, дата изменения и число
+        просмотров берутся одним запросом. ETag строится по ключу кеша и
+        этим значениям, поэтому ответ 304 отдаётся без построения тела.
+        Просмотр учитывается в счётчике процесса.
+        """
+        if not settings.RECIPE_FAST_READ_PATH:
+            instance = self.get_object()
+            view_counter.increment(instance.id)
+            data = self.get_serializer(instance).data
+            return self.get_validated_response(
+                request, data, make_etag(data), instance.updated
+            )
+        sparse_fields = self.get_sparse_fields()
+        try:
+            recipe_id = int(kwargs[self.lookup_field])
+        except (TypeError, ValueError):
+            raise Http404
+        overlay = get_recipe_overlay(recipe_id, request.user)
+        if overlay is None:
+            raise Http404
+        view_counter.increment(recipe_id)
+        cache_key = recipe_detail_cache_key(
+            request, recipe_id, overlay['author_id']
+        )
+
+        def build():
+            cached = get_or_build(
+                cache_key,
+                lambda: FastRecipeSerializer(
+                    [recipe_id],
+                    context={'request': request},
+                    personalize=False
+                ).data[0],
+                settings.RECIPE_DETAIL_CACHE_TTL
+            )
+            data = dict(cached)
+            data['author'] = dict(
+                cached['author'], is_subscribed=overlay['is_subscribed']
+            )
+            data['is_favorited'] = overlay['is_favorited']
+            data['is_in_shopping_cart'] = overlay['is_in_shopping_cart']
+            data['views_count'] = overlay['views_count']
+            return prune_recipe(data, sparse_fields)
+
+        return self.get_validated_response(
+            request,
+            build,
+            (cache_key, overlay, request.get_full_path()),
+            overlay['updated']
+        )
+
+    def get_recipe_data(self, recipe):
+        """Ответ с рецептом после создания или обновления."""
+        if not settings.RECIPE_FAST_READ_PATH:
+            return RecipeSerializer(
+                recipe, context=self.get_serializer_context()
+            ).data
+        return FastRecipeSerializer(
+            [recipe.id], context=self.get_serializer_context()
+        ).data[0]
+
     def perform_create(self, serializer):
         recipe = serializer.save(author=self.request.user)
-        original_url = f'/recipes/{recipe.id}/'
-        short_link = ShortLink(original_url=original_url, recipe=recipe)
-        short_link.save()
+        enqueue('recipe.create_short_link', priority=1, recipe_id=recipe.id)
+        enqueue(
+            'recipe.fan_out', recipe_id=recipe.id, author_id=recipe.author_id
+        )
+
+    def perform_update(self, serializer):
+        old_image = serializer.instance.image.name
+        recipe = serializer.save()
+        if old_image and old_image != recipe.image.name:
+            enqueue('jobs.delete_files', names=[old_image])
+
+    def perform_destroy(self, instance):
+        soft_delete_recipes([instance.id])
 
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        recipe = serializer.instance
-        recipe_serializer = RecipeSerializer(
-            recipe,
-            context={'request': self.request}
+        return Response(
+            self.get_recipe_data(serializer.instance),
+            status=status.HTTP_201_CREATED
         )
-        return Response(recipe_serializer.data, status=status.HTTP_201_CREATED)
 
     def update(self, request, *args, **kwargs):
         """Переопределяет метод update для возврата кастомного ответа."""
@@ -241,12 +539,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
         )
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
-        recipe = serializer.instance
-        recipe_serializer = RecipeSerializer(
-            recipe,
-            context={'request': self.request}
+        return Response(
+            self.get_recipe_data(serializer.instance),
+            status=status.HTTP_200_OK
         )
-        return Response(recipe_serializer.data, status=status.HTTP_200_OK)
 
     @action(
         methods=['get'],
@@ -256,7 +552,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
     def get_short_link(self, request, pk):
         """Получение короткой ссылки."""
         recipe = get_object_or_404(Recipe, id=pk)
-        short_link = get_object_or_404(ShortLink, recipe=recipe)
+        short_link = get_or_create_short_link(recipe.id)
         base_url = f"{request.scheme}://{request.get_host()}"
         full_url = urljoin(base_url, f"/s/{short_link.short_url}")
         return Response({'short-link': full_url})
@@ -287,16 +583,88 @@ class RecipeViewSet(viewsets.ModelViewSet):
 
         return response
 
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='feed',
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        """Лента рецептов авторов, на которых подписан пользователь."""
+        keys = self.paginator.paginate_keys(
+            partial(get_feed_keys, request.user), request
+        )
+        serializer = FastRecipeSerializer(
+            [recipe_id for _, recipe_id in keys],
+            context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(
+        methods=['get'],
+        detail=False,
+        url_path='cookable',
+        serializer_class=RecipeCookableSerializer
+    )
+    def cookable_recipes(self, request):
+        """Поиск рецептов по имеющимся ингредиентам.
+
+        Сначала возвращаются рецепты, которые можно приготовить полностью,
+        затем рецепты, для которых не хватает одного, двух ингредиентов.
+        """
+        params = CookableQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        page = self.paginate_queryset(get_cookable_recipes(
+            Recipe.objects.all(),
+            params.validated_data['ingredients'],
+            params.validated_data['max_missing']
+        ))
+        missing_counts = dict(page)
+        if settings.RECIPE_FAST_READ_PATH:
+            data = FastRecipeSerializer(
+                missing_counts, context=self.get_serializer_context()
+            ).data
+            for item in data:
+                item['missing_count'] = missing_counts[item['id']]
+        else:
+            recipes = self.get_queryset().in_bulk(missing_counts)
+            for recipe in recipes.values():
+                recipe.missing_count = missing_counts[recipe.id]
+            data = self.get_serializer(
+                [recipes[pk] for pk in missing_counts if pk in recipes],
+                many=True
+            ).data
+        return self.get_paginated_response(data)
+
+    @action(
+        methods=['get'],
+        detail=True,
+        url_path='similar',
+        serializer_class=RecipeShortSerializer
+    )
+    def similar_recipes(self, request, pk=None):
+        """Получение похожих рецептов."""
+        recipe = get_object_or_404(Recipe, id=pk)
+        params = SimilarQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        recipes = get_similar_recipes(recipe, params.validated_data['limit'])
+        serializer = self.get_serializer(recipes, many=True)
+        return Response(serializer.data)
+
     def handle_action(
         self, request, pk, model, error_message
     ):
-        """Общий метод для обработки добавления/удаления рецепта."""
+        """Общий метод для обработки добавления/удаления рецепта.
+
+        Добавление и удаление выполняются одним запросом, результат
+        определяется количеством затронутых строк.
+        """
         user = request.user
-        recipe = get_object_or_404(Recipe, id=pk)
 
         if request.method == 'POST':
-            if not model.objects.filter(user=user, recipe=recipe).exists():
-                model.objects.create(user=user, recipe=recipe)
+            recipe = get_object_or_404(Recipe, id=pk)
+            if insert_ignore(model, user_id=user.id, recipe_id=recipe.id):
+                record_changes(model, ChangeLog.CREATED, [recipe.id], user.id)
                 serializer = RecipeShortSerializer(recipe)
                 return Response(
                     serializer.data,
@@ -308,10 +676,10 @@ class RecipeViewSet(viewsets.ModelViewSet):
             )
 
         if request.method == 'DELETE':
-            item = model.objects.filter(user=user, recipe=recipe)
-            if item.exists():
-                item.delete()
+            if delete_returning(model, user_id=user.id, recipe_id=pk):
+                record_changes(model, ChangeLog.DELETED, [int(pk)], user.id)
                 return Response(status=status.HTTP_204_NO_CONTENT)
+            get_object_or_404(Recipe, id=pk)
             return Response(
                 {"detail": error_message},
                 status=status.HTTP_400_BAD_REQUEST
@@ -336,3 +704,34 @@ class RecipeViewSet(viewsets.ModelViewSet):
             model=ShoppingCart,
             error_message="Рецепт не найден в списке покупок"
         )
+
+    def handle_batch_action(self, request, model):
+        """Общий метод пакетного добавления/удаления рецептов."""
+        serializer = RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        recipe_ids = serializer.validated_data['ids']
+        if request.method == 'POST':
+            results = add_recipes(model, request.user, recipe_ids)
+        else:
+            results = remove_recipes(model, request.user, recipe_ids)
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='favorite/batch',
+        url_name='favorite-batch'
+    )
+    def favorite_batch(self, request):
+        """Пакетное добавление/удаление рецептов из избранного."""
+        return self.handle_batch_action(request, Favorite)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=False,
+        url_path='shopping_cart/batch',
+        url_name='shopping-cart-batch'
+    )
+    def shopping_cart_batch(self, request):
+        """Пакетное добавление/удаление рецептов из корзины."""
+        return self.handle_batch_action(request, ShoppingCart)
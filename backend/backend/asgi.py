@@ -9,8 +9,20 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
+from asgiref.sync import ThreadSensitiveContext
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+
+async def application(scope, receive, send):
+    """Выполняет синхронный код каждого запроса в собственном потоке.
+
+    Django 3.2 сам не создаёт ``ThreadSensitiveContext``, и без него весь
+    синхронный код (ORM, синхронные представления и middleware) всех
+    запросов выполняется в одном потоке.
+    """
+    async with ThreadSensitiveContext():
+        await django_application(scope, receive, send)
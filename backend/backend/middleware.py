@@ -0,0 +1,79 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .routers import allow_replica_reads, use_primary
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def primary_pin_key(request):
+    """Ключ закрепления клиента за основной базой.
+
+    Клиент определяется по заголовку ``Authorization`` или сессии.
+    """
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'db:primary-pin:{digest}'
+
+
+class ReplicaRoutingMiddleware:
+    """Разрешает чтения с реплик для безопасных запросов.
+
+    После успешного изменяющего запроса клиент на
+    ``REPLICA_PRIMARY_PIN_SECONDS`` секунд читает из основной базы, чтобы
+    видеть собственные изменения до того, как их получат реплики.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        pin_key = primary_pin_key(request)
+        if request.method not in SAFE_METHODS:
+            with use_primary():
+                response = self.get_response(request)
+            if pin_key is not None and response.status_code < 400:
+                cache.set(pin_key, 1, settings.REPLICA_PRIMARY_PIN_SECONDS)
+            return response
+        if pin_key is not None and cache.get(pin_key):
+            with use_primary():
+                return self.get_response(request)
+        with allow_replica_reads():
+            return self.get_response(request)
+
+
+class DatabasePoolTimingMiddleware:
+    """Добавляет в ответ время ожидания соединения из пула.
+
+    Значение передаётся в заголовке ``Server-Timing`` как ``db-pool``
+    в миллисекундах и может писаться в журнал nginx.
+    """
+
+    def __init__(self, get_response):
+        if not any(
+            (database.get('POOL') or {}).get('MAX_SIZE')
+            for database in settings.DATABASES.values()
+        ):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        for connection in connections.all():
+            connection.pool_wait_time = 0.0
+        response = self.get_response(request)
+        waited = sum(
+            getattr(connection, 'pool_wait_time', 0.0)
+            for connection in connections.all()
+        )
+        response['Server-Timing'] = f'db-pool;dur={waited * 1000:.1f}'
+        return response
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from django.db.backends.postgresql import base
+
+from .pool import ConnectionPool
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias):
+    """Пул соединений псевдонима базы или ``None``, если пул не создан."""
+    return pools.get(alias)
+
+
+def get_pool_stats():
+    """Статистика созданных в процессе пулов по псевдонимам баз."""
+    with pools_lock:
+        return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений и пулом соединений.
+
+    ``CONN_HEALTH_CHECKS`` проверяет переиспользуемое соединение перед
+    первым запросом в рамках HTTP-запроса. ``POOL`` с ненулевым
+    ``MAX_SIZE`` берёт соединения из общего для потоков пула и возвращает
+    их туда вместо закрытия.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+        self.pool_wait_time = 0.0
+
+    @property
+    def pool(self):
+        options = self.settings_dict.get('POOL') or {}
+        if not options.get('MAX_SIZE'):
+            return None
+        with pools_lock:
+            if self.alias not in pools:
+                pools[self.alias] = ConnectionPool(
+                    max_size=options['MAX_SIZE'],
+                    timeout=options.get('TIMEOUT', 10),
+                    slow_wait=options.get('SLOW_WAIT', 0.1),
+                )
+            return pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        while True:
+            connection, idle_since, self.pool_wait_time = pool.getconn(
+                lambda: super(DatabaseWrapper, self).get_new_connection(
+                    conn_params
+                )
+            )
+            if idle_since is None:
+                return connection
+            if self.is_stale(connection, idle_since):
+                pool.discard(connection)
+                continue
+            self.isolation_level = self.settings_dict['OPTIONS'].get(
+                'isolation_level', connection.isolation_level
+            )
+            return connection
+
+    def is_stale(self, connection, idle_since):
+        """Проверяет простаивавшее в пуле соединение перед выдачей."""
+        if connection.closed:
+            return True
+        max_idle = self.settings_dict['POOL'].get('CHECK_IDLE', 30)
+        if (
+            not self.settings_dict.get('CONN_HEALTH_CHECKS')
+            or time.monotonic() - idle_since < max_idle
+        ):
+            return False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except base.Database.Error:
+            return True
+        return False
+
+    def connect(self):
+        self.health_check_done = True
+        super().connect()
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        if self.errors_occurred:
+            pool.discard(self.connection)
+            return
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+
+    def ensure_connection(self):
+        if (
+            self.connection is not None
+            and self.settings_dict.get('CONN_HEALTH_CHECKS')
+            and not self.health_check_done
+            and not self.in_atomic_block
+        ):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        self.health_check_done = False
+        super().close_if_unusable_or_obsolete()
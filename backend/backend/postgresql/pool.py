@@ -0,0 +1,112 @@
+import logging
+import threading
+import time
+
+from psycopg2 import OperationalError
+from psycopg2.extensions import STATUS_READY
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений psycopg2, общий для потоков процесса.
+
+    Если все соединения заняты, запрос соединения ждёт до ``timeout``
+    секунд. Время ожидания накапливается в статистике пула.
+    """
+
+    def __init__(self, max_size, timeout, slow_wait):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.slow_wait = slow_wait
+        self.idle = []
+        self.size = 0
+        self.condition = threading.Condition()
+        self.checkouts = 0
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def getconn(self, connect):
+        """Свободное соединение из пула или новое, пока есть место.
+
+        Возвращает соединение, время его возврата в пул (``None`` для
+        нового соединения) и время ожидания в секундах.
+        """
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = 0.0
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise OperationalError(
+                        'connection pool exhausted: '
+                        f'{self.max_size} connections in use'
+                    )
+                self.condition.wait(remaining)
+                waited = time.monotonic() - started
+            if self.idle:
+                connection, idle_since = self.idle.pop()
+            else:
+                connection, idle_since = None, None
+                self.size += 1
+            self.record_checkout(waited)
+        if connection is None:
+            try:
+                connection = connect()
+            except Exception:
+                self.discard()
+                raise
+        return connection, idle_since, waited
+
+    def record_checkout(self, waited):
+        self.checkouts += 1
+        if not waited:
+            return
+        self.waits += 1
+        self.wait_time_total += waited
+        self.wait_time_max = max(self.wait_time_max, waited)
+        if waited >= self.slow_wait:
+            logger.warning(
+                'Waited %.3f s for a database connection (pool size %d)',
+                waited, self.max_size
+            )
+
+    def putconn(self, connection):
+        """Возвращает соединение в пул, сбрасывая незавершённую транзакцию."""
+        if not connection.closed and connection.status != STATUS_READY:
+            try:
+                connection.rollback()
+            except Exception:
+                connection.close()
+        if connection.closed:
+            self.discard()
+            return
+        with self.condition:
+            self.idle.append((connection, time.monotonic()))
+            self.condition.notify()
+
+    def discard(self, connection=None):
+        """Освобождает место в пуле, закрывая соединение."""
+        if connection is not None and not connection.closed:
+            connection.close()
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def stats(self):
+        with self.condition:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'checkouts': self.checkouts,
+                'waits': self.waits,
+                'wait_time_total': self.wait_time_total,
+                'wait_time_max': self.wait_time_max,
+                'timeouts': self.timeouts,
+            }
@@ -0,0 +1,92 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+replica_reads_allowed = ContextVar('replica_reads_allowed', default=False)
+
+unhealthy_until = {}
+
+
+@contextmanager
+def use_primary():
+    """Направляет чтения внутри блока в основную базу."""
+    token = replica_reads_allowed.set(False)
+    try:
+        yield
+    finally:
+        replica_reads_allowed.reset(token)
+
+
+@contextmanager
+def allow_replica_reads():
+    """Разрешает чтения с реплик внутри блока."""
+    token = replica_reads_allowed.set(True)
+    try:
+        yield
+    finally:
+        replica_reads_allowed.reset(token)
+
+
+def replicas_enabled():
+    return bool(settings.DATABASE_REPLICAS) and replica_reads_allowed.get()
+
+
+def is_healthy(alias):
+    """Проверяет соединение с репликой.
+
+    Недоступная реплика исключается из выбора на время
+    ``REPLICA_UNHEALTHY_COOLDOWN`` секунд.
+    """
+    if unhealthy_until.get(alias, 0) > time.monotonic():
+        return False
+    try:
+        connections[alias].ensure_connection()
+    except DatabaseError:
+        unhealthy_until[alias] = (
+            time.monotonic() + settings.REPLICA_UNHEALTHY_COOLDOWN
+        )
+        return False
+    unhealthy_until.pop(alias, None)
+    return True
+
+
+def choose_replica():
+    """Случайная доступная реплика или основная база."""
+    replicas = list(settings.DATABASE_REPLICAS)
+    random.shuffle(replicas)
+    for alias in replicas:
+        if is_healthy(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    """Маршрутизатор чтений на реплики.
+
+    Чтения идут на реплики только там, где это разрешено
+    ``ReplicaRoutingMiddleware``, и никогда внутри транзакции основной
+    базы. Запись и миграции всегда выполняются в основной базе, как и
+    чтения таблицы кеша ``DatabaseCache``.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            not replicas_enabled()
+            or model._meta.app_label == 'django_cache'
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return choose_replica()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -34,15 +34,18 @@ LOCAL_APPS = [
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
     'recipe.apps.RecipeConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 INSTALLED_APPS = DJANGO_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'backend.middleware.DatabasePoolTimingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'backend.middleware.ReplicaRoutingMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -70,15 +73,47 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'foodgram'),
         'USER': os.getenv('POSTGRES_USER', 'foodgram_user'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
-        'PORT': os.getenv('DB_PORT', 5432)
+        'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DB_CONN_HEALTH_CHECKS', 'True'
+        ).lower() in ('true', '1', 'yes'),
+        'POOL': {
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', 0)),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', 10)),
+            'SLOW_WAIT': float(os.getenv('DB_POOL_SLOW_WAIT', 0.1)),
+            'CHECK_IDLE': int(os.getenv('DB_POOL_CHECK_IDLE', 30)),
+        },
     }
 }
 
+DATABASE_REPLICAS = []
+
+for number, replica_host in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1
+):
+    host, _, port = replica_host.strip().partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['backend.routers.ReplicaRouter']
+
+REPLICA_PRIMARY_PIN_SECONDS = int(
+    os.getenv('REPLICA_PRIMARY_PIN_SECONDS', 10)
+)
+REPLICA_UNHEALTHY_COOLDOWN = int(os.getenv('REPLICA_UNHEALTHY_COOLDOWN', 30))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -118,12 +153,49 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
     'PAGE_SIZE': 10,
     'DEFAULT_PAGINATION_CLASS': None
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'tastebook'),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'tastebook'),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+
+LOCAL_CACHE_SIZE = int(os.getenv('LOCAL_CACHE_SIZE', 1024))
+LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL', 5))
+
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 10))
+
+RECIPE_FAST_READ_PATH = os.getenv(
+    'RECIPE_FAST_READ_PATH', 'True'
+).lower() in ('true', '1', 'yes')
+
+ASYNC_READ_VIEWS = os.getenv(
+    'ASYNC_READ_VIEWS', 'False'
+).lower() in ('true', '1', 'yes')
+
+RECIPE_LIST_CACHE_TTL = int(os.getenv('RECIPE_LIST_CACHE_TTL', 60))
+RECIPE_DETAIL_CACHE_TTL = int(os.getenv('RECIPE_DETAIL_CACHE_TTL', 600))
+REFERENCE_LIST_CACHE_TTL = int(os.getenv('REFERENCE_LIST_CACHE_TTL', 3600))
+RECIPE_HTTP_MAX_AGE = int(os.getenv('RECIPE_HTTP_MAX_AGE', 10))
+
+VIEW_COUNTS_FLUSH_INTERVAL = int(os.getenv('VIEW_COUNTS_FLUSH_INTERVAL', 10))
+VIEW_COUNTS_MAX_PENDING = int(os.getenv('VIEW_COUNTS_MAX_PENDING', 1000))
+
 SILENCED_SYSTEM_CHECKS = ['rest_framework.W001']
 
 DJOSER = {
@@ -1,4 +1,5 @@
-from api.views import redirect_short_link
+from api import async_views, views
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 
@@ -7,7 +8,10 @@ urlpatterns = [
     path('api/', include('api.urls')),
     path(
         's/<str:short_code>',
-        redirect_short_link,
+        (
+            async_views.redirect_short_link
+            if settings.ASYNC_READ_VIEWS else views.redirect_short_link
+        ),
         name='redirect_short_link'
     )
 ]
@@ -0,0 +1,124 @@
+"""Нагрузочный тест конкурентных GET-запросов.
+
+Открывает ``--concurrency`` соединений keep-alive и отправляет по ним
+``--requests`` запросов, после чего выводит пропускную способность
+и перцентили задержки. Используется для сравнения режимов запуска:
+
+    SERVER_MODE=wsgi gunicorn
+    SERVER_MODE=asgi ASYNC_READ_VIEWS=True gunicorn
+
+    python benchmarks/concurrency.py http://127.0.0.1:8080/api/tags/ \\
+        --concurrency 200 --requests 20000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def fetch(reader, writer, request):
+    """Отправляет запрос и читает ответ с заголовком Content-Length."""
+    writer.write(request)
+    await writer.drain()
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('connection closed by server')
+    length = 0
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            keep_alive = False
+    await reader.readexactly(length)
+    return int(status_line.split()[1]), keep_alive
+
+
+async def worker(url, queue, latencies, statuses):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path = f'{path}?{parts.query}'
+    request = (
+        f'GET {path} HTTP/1.1\r\n'
+        f'Host: {parts.netloc}\r\n'
+        'Accept: application/json\r\n'
+        'Connection: keep-alive\r\n\r\n'
+    ).encode()
+    connection = None
+    while True:
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if connection is None:
+            connection = await asyncio.open_connection(
+                parts.hostname, parts.port or 80
+            )
+        started = time.perf_counter()
+        try:
+            status, keep_alive = await fetch(*connection, request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            connection[1].close()
+            connection = None
+            statuses['error'] = statuses.get('error', 0) + 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        statuses[status] = statuses.get(status, 0) + 1
+        if not keep_alive:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def run(url, concurrency, total):
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+    latencies = []
+    statuses = {}
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        worker(url, queue, latencies, statuses) for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    return elapsed, latencies, statuses
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args()
+
+    elapsed, latencies, statuses = asyncio.run(
+        run(args.url, args.concurrency, args.requests)
+    )
+    latencies.sort()
+    print(f'Запросов: {len(latencies)} за {elapsed:.2f} с, '
+          f'{len(latencies) / elapsed:.0f} запросов/с')
+    print(f'Статусы: {statuses}')
+    if latencies:
+        print(
+            'Задержка, мс: '
+            f'p50={percentile(latencies, 0.5) * 1000:.1f} '
+            f'p95={percentile(latencies, 0.95) * 1000:.1f} '
+            f'p99={percentile(latencies, 0.99) * 1000:.1f} '
+            f'среднее={statistics.mean(latencies) * 1000:.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
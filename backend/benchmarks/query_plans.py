@@ -0,0 +1,138 @@
+"""Планы запросов списка рецептов с индексами и без них.
+
+Внутри транзакции заполняет базу ``--recipes`` тестовыми рецептами,
+собирает статистику и выводит ``EXPLAIN ANALYZE`` запросов страницы
+списка с типичными фильтрами: сначала с индексами модели ``Recipe``,
+затем без индексов сортировки и фильтрации. В конце транзакция
+откатывается, поэтому данные и индексы базы не меняются, но индексы
+удерживаются под блокировкой до отката. Запускается на копии базы
+PostgreSQL из директории ``backend``:
+
+    python benchmarks/query_plans.py --recipes 200000
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from api.filters import RecipeFilter  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from recipe.models import Recipe, Tag  # noqa: E402
+
+User = get_user_model()
+
+DROPPED_INDEXES = (
+    'recipe_created_idx',
+    'recipe_author_created_idx',
+    'recipe_cooking_time_idx',
+    'recipe_tag_ids_gin',
+)
+
+SEED_RECIPES_SQL = (
+    'INSERT INTO {recipe} (name, text, image, cooking_time, author_id, '
+    'created, updated, views_count, ingredient_ids, tag_ids) '
+    'SELECT %s || i, %s, %s, 1 + i %% 180, '
+    '(%s::integer[])[1 + i %% cardinality(%s::integer[])], '
+    "now() - i * interval '1 minute', now(), (i * 7919) %% 10000, '{{}}', "
+    'ARRAY[(%s::integer[])[1 + i %% cardinality(%s::integer[])]] '
+    'FROM generate_series(1, %s) AS i'
+).format(recipe=Recipe._meta.db_table)
+
+
+class Rollback(Exception):
+    """Откатывает транзакцию с тестовыми данными."""
+
+
+def seed(recipes, authors):
+    """Добавляет авторов и рецепты, возвращает параметры для фильтров.
+
+    Рецептам назначаются существующие теги: слаги новых тегов попали бы
+    в кеш тегов только после фиксации транзакции.
+    """
+    users = User.objects.bulk_create(
+        User(
+            email=f'bench{number}@example.org',
+            username=f'bench{number}',
+            first_name='Bench',
+            last_name=str(number),
+            password='!'
+        )
+        for number in range(authors)
+    )
+    tags = list(Tag.objects.all()[:5]) or Tag.objects.bulk_create(
+        Tag(name=f'Bench {number}', slug=f'bench-{number}')
+        for number in range(5)
+    )
+    author_ids = [user.id for user in users]
+    tag_ids = [tag.id for tag in tags]
+    with connection.cursor() as cursor:
+        cursor.execute(SEED_RECIPES_SQL, [
+            'Рецепт ', '', 'recipes/images/bench.png',
+            author_ids, author_ids, tag_ids, tag_ids, recipes
+        ])
+        cursor.execute(f'ANALYZE {Recipe._meta.db_table}')
+    return {'author': author_ids[0], 'tags': [tag.slug for tag in tags[:2]]}
+
+
+def get_queries(sample):
+    """Параметры запросов страницы списка рецептов."""
+    return (
+        ('Лента по умолчанию', {}),
+        ('Страница автора', {'author': sample['author']}),
+        ('Рецепты с тегами', {'tags': sample['tags']}),
+        ('Быстрые рецепты', {'cooking_time_max': 15}),
+        (
+            'Быстрые рецепты по времени',
+            {'cooking_time_max': 15, 'ordering': 'cooking_time'}
+        ),
+        ('Популярные рецепты', {'ordering': '-views_count'}),
+    )
+
+
+def explain(params, limit):
+    filterset = RecipeFilter(params, queryset=Recipe.objects.all())
+    if not filterset.is_valid():
+        raise ValueError(filterset.errors)
+    return filterset.qs[:limit].explain(analyze=True, buffers=True)
+
+
+def print_plans(title, queries, limit):
+    print(f'===== {title} =====')
+    for name, params in queries:
+        print(f'--- {name}: {params}')
+        print(explain(params, limit))
+        print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=100000)
+    parser.add_argument('--authors', type=int, default=500)
+    parser.add_argument('--limit', type=int, default=6)
+    args = parser.parse_args()
+
+    if connection.vendor != 'postgresql':
+        sys.exit('Нужна база PostgreSQL.')
+    try:
+        with transaction.atomic():
+            queries = get_queries(seed(args.recipes, args.authors))
+            print_plans('С индексами', queries, args.limit)
+            with connection.cursor() as cursor:
+                for name in DROPPED_INDEXES:
+                    cursor.execute(f'DROP INDEX {name}')
+            print_plans('Без индексов', queries, args.limit)
+            raise Rollback
+    except Rollback:
+        pass
+
+
+if __name__ == '__main__':
+    main()
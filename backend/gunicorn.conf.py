@@ -0,0 +1,14 @@
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8080')
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+
+if os.getenv('SERVER_MODE', 'wsgi') == 'asgi':
+    wsgi_app = 'backend.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Синхронный код каждого ASGI-запроса выполняется в новом потоке,
+    # поэтому соединения с базой берутся из общего пула процесса.
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+    os.environ.setdefault('DB_POOL_MAX_SIZE', '20')
+else:
+    wsgi_app = 'backend.wsgi'
@@ -0,0 +1,26 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    """Настройки раздела фоновых задач админ зоны."""
+
+    list_display = (
+        'pk', 'name', 'status', 'priority', 'attempts', 'run_at', 'locked_by'
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', )
+    readonly_fields = ('created', 'locked_until', 'locked_by', 'last_error')
+    actions = ('requeue', )
+
+    @admin.action(description='Вернуть в очередь')
+    def requeue(self, request, queryset):
+        queryset.update(
+            status=Job.QUEUED,
+            attempts=0,
+            run_at=timezone.now(),
+            locked_until=None,
+        )
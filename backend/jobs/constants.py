@@ -0,0 +1,9 @@
+MAX_LENGTH_JOB_NAME: int = 128
+MAX_LENGTH_WORKER_ID: int = 128
+DEFAULT_PRIORITY: int = 0
+DEFAULT_MAX_ATTEMPTS: int = 5
+VISIBILITY_TIMEOUT: int = 300
+RETRY_BASE_DELAY: int = 10
+RETRY_MAX_DELAY: int = 3600
+WORKER_BATCH_SIZE: int = 10
+WORKER_POLL_INTERVAL: float = 1.0
@@ -0,0 +1,74 @@
+import os
+import signal
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from jobs.constants import (VISIBILITY_TIMEOUT, WORKER_BATCH_SIZE,
+                            WORKER_POLL_INTERVAL)
+from jobs.services import claim_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs from the database queue'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=WORKER_BATCH_SIZE,
+            help='Number of jobs claimed at once',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=WORKER_POLL_INTERVAL,
+            help='Seconds to sleep when the queue is empty',
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=int,
+            default=VISIBILITY_TIMEOUT,
+            help='Seconds before a claimed job is given to another worker',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty',
+        )
+
+    def handle(self, *args, **kwargs):
+        worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        processed = failed = 0
+        while not self.stopping:
+            close_old_connections()
+            jobs = claim_jobs(
+                worker_id,
+                kwargs['batch_size'],
+                kwargs['visibility_timeout']
+            )
+            if not jobs:
+                if kwargs['once']:
+                    break
+                time.sleep(kwargs['poll_interval'])
+                continue
+            for job in jobs:
+                result = run_job(job, kwargs['visibility_timeout'])
+                if result:
+                    processed += 1
+                elif result is not None:
+                    failed += 1
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Воркер {worker_id} остановлен: выполнено {processed}, '
+                f'с ошибкой {failed}.'
+            )
+        )
+
+    def stop(self, signum, frame):
+        """Завершает работу после текущей пачки задач."""
+        self.stopping = True
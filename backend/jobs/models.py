@@ -0,0 +1,69 @@
+from django.db import models
+
+from .constants import (DEFAULT_MAX_ATTEMPTS, DEFAULT_PRIORITY,
+                        MAX_LENGTH_JOB_NAME, MAX_LENGTH_WORKER_ID)
+
+
+class Job(models.Model):
+    """Фоновая задача в очереди на базе данных.
+
+    Задача выполняется воркером ``run_jobs``. Взятая задача скрыта от
+    других воркеров до ``locked_until``; если воркер не завершил её за это
+    время, задача выдаётся повторно.
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Задача', max_length=MAX_LENGTH_JOB_NAME)
+    payload = models.JSONField('Аргументы', default=dict, blank=True)
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUS_CHOICES,
+        default=QUEUED
+    )
+    priority = models.SmallIntegerField(
+        'Приоритет',
+        default=DEFAULT_PRIORITY,
+        help_text='Задачи с большим приоритетом выполняются раньше'
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток', default=DEFAULT_MAX_ATTEMPTS
+    )
+    run_at = models.DateTimeField('Запустить после')
+    locked_until = models.DateTimeField(
+        'Заблокирована до', null=True, blank=True
+    )
+    locked_by = models.CharField(
+        'Воркер', max_length=MAX_LENGTH_WORKER_ID, blank=True
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+
+    class Meta:
+        ordering = ('-priority', 'run_at', 'id')
+        verbose_name = 'фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [
+            models.Index(
+                fields=['-priority', 'run_at', 'id'],
+                condition=models.Q(status='queued'),
+                name='job_queued_idx'
+            ),
+            models.Index(
+                fields=['locked_until'],
+                condition=models.Q(status='running'),
+                name='job_running_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
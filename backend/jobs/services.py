@@ -0,0 +1,119 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .constants import (DEFAULT_MAX_ATTEMPTS, DEFAULT_PRIORITY,
+                        RETRY_BASE_DELAY, RETRY_MAX_DELAY, VISIBILITY_TIMEOUT)
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(name):
+    """Регистрирует функцию как фоновую задачу с именем ``name``.
+
+    Аргументы задачи передаются именованными и должны сериализоваться
+    в JSON.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, priority=DEFAULT_PRIORITY, delay=0,
+            max_attempts=DEFAULT_MAX_ATTEMPTS, **payload):
+    """Ставит задачу в очередь.
+
+    Задача записывается в ту же базу, что и данные, поэтому внутри
+    транзакции становится видна воркерам только после её фиксации.
+    """
+    if name not in registry:
+        raise KeyError(f'Неизвестная фоновая задача: {name}')
+    return Job.objects.create(
+        name=name,
+        payload=payload,
+        priority=priority,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + timedelta(seconds=delay),
+    )
+
+
+def claim_jobs(worker_id, limit, visibility_timeout=VISIBILITY_TIMEOUT):
+    """Забирает готовые к выполнению задачи.
+
+    Кроме задач в очереди забираются задачи, чьё время блокировки
+    истекло: воркер, взявший их, считается упавшим. Строки блокируются
+    с ``SKIP LOCKED``, поэтому несколько воркеров не получают одну задачу.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            Job.objects.select_for_update(skip_locked=True).filter(
+                Q(status=Job.QUEUED, run_at__lte=now)
+                | Q(status=Job.RUNNING, locked_until__lte=now)
+            ).order_by('-priority', 'run_at', 'id')[:limit]
+        )
+        for job in jobs:
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=visibility_timeout)
+        Job.objects.bulk_update(
+            jobs, ['status', 'attempts', 'locked_by', 'locked_until']
+        )
+    return jobs
+
+
+def retry_delay(attempts):
+    """Экспоненциальная задержка перед повторной попыткой."""
+    return min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY)
+
+
+def run_job(job, visibility_timeout=VISIBILITY_TIMEOUT):
+    """Выполняет задачу и обновляет её состояние.
+
+    Перед запуском блокировка задачи продлевается на
+    ``visibility_timeout`` секунд: задачи пачки ждут своей очереди
+    в воркере и могли пережить блокировку, выданную при захвате. Если
+    задачу уже забрал другой воркер, она не выполняется и возвращается
+    ``None``. Успешная задача удаляется. После ошибки задача возвращается
+    в очередь с задержкой или, если попытки исчерпаны, помечается как
+    ошибочная. Изменения задачи, выполненной после истечения блокировки
+    другим воркером, не сохраняются.
+    """
+    owned = Job.objects.filter(pk=job.pk, locked_by=job.locked_by)
+    if not owned.filter(status=Job.RUNNING).update(
+        locked_until=timezone.now() + timedelta(seconds=visibility_timeout)
+    ):
+        logger.warning('Job %s was claimed by another worker', job)
+        return None
+    try:
+        with transaction.atomic():
+            registry[job.name](**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Job %s failed (attempt %d)', job, job.attempts)
+        if job.name in registry and job.attempts < job.max_attempts:
+            owned.update(
+                status=Job.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts)
+                ),
+                locked_until=None,
+                last_error=error,
+            )
+        else:
+            owned.update(
+                status=Job.FAILED, locked_until=None, last_error=error
+            )
+        return False
+    owned.delete()
+    return True
@@ -0,0 +1,10 @@
+from django.core.files.storage import default_storage
+
+from .services import task
+
+
+@task('jobs.delete_files')
+def delete_files(names):
+    """Удаляет файлы из хранилища, например замененные изображения."""
+    for name in names:
+        default_storage.delete(name)
@@ -1,20 +1,53 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from .models import (Favorite, Follow, Ingredient, IngredientRecipe, Recipe,
                      ShoppingCart, ShortLink, Tag)
+from .services import soft_delete_recipes
 
 
-class RecipeIngredientInline(admin.StackedInline):
+class BackgroundDeleteMixin:
+    """Удаление через пометку объектов и фоновую очистку.
+
+    Подтверждение удаления не собирает связанные объекты, поэтому
+    удаление автора с большим числом рецептов не загружает их в память.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return (
+            [str(obj) for obj in objs],
+            {self.model._meta.verbose_name_plural: len(objs)},
+            set(),
+            []
+        )
+
+    def delete_model(self, request, obj):
+        self.soft_delete([obj.pk])
+
+    def delete_queryset(self, request, queryset):
+        self.soft_delete(list(queryset.values_list('pk', flat=True)))
+
+
+class RecipeIngredientInline(admin.TabularInline):
     model = IngredientRecipe
     extra = 0
+    autocomplete_fields = ('ingredient', )
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'ingredient', 'recipe'
+        )
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
+class RecipeAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     """Настройки раздела рецетов админ зоны."""
 
-    list_display = ('pk', 'name', 'author', 'favorites_count')
+    list_display = ('pk', 'name', 'author', 'favorites_count', 'views_count')
     list_display_links = ('name', )
+    list_select_related = ('author', )
+    autocomplete_fields = ('author', )
     search_fields = ('name', 'author__username')
     list_filter = ('tags', )
     fields = (
@@ -27,11 +60,32 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     inlines = [RecipeIngredientInline]
     readonly_fields = ('favorites_count', )
+    soft_delete = staticmethod(soft_delete_recipes)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_total=Count('favorite_set')
+        )
+
+    def save_model(self, request, obj, form, change):
+        """Сохраняет при изменении только поля формы и дату изменения.
+
+        Счётчик просмотров и индексы ингредиентов и тегов обновляются
+        в обход формы и не должны перезаписываться значениями, прочитанными
+        при её открытии.
+        """
+        if not change:
+            return super().save_model(request, obj, form, change)
+        obj.save(update_fields=[
+            field.name for field in obj._meta.concrete_fields
+            if field.name in form.fields
+        ] + ['updated'])
 
     def favorites_count(self, obj):
-        return obj.favorite_set.count()
+        return obj.favorites_total
 
     favorites_count.short_description = 'Добавлений в избранное'
+    favorites_count.admin_order_field = 'favorites_total'
 
 
 @admin.register(Ingredient)
@@ -40,6 +94,7 @@ class IngredientAdmin(admin.ModelAdmin):
 
     list_display = ('pk', 'name', 'measurement_unit')
     search_fields = ('name', )
+    ordering = ('name', )
 
 
 @admin.register(Tag)
@@ -54,6 +109,7 @@ class BaseRecipeAdmin(admin.ModelAdmin):
     """Базовый класс для админки моделей избранного и корзины."""
 
     list_display = ('pk', 'user', 'recipe')
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__username', 'recipe__name')
     readonly_fields = ('user', 'recipe')
     ordering = ('user', )
@@ -74,6 +130,7 @@ class FollowAdmin(admin.ModelAdmin):
     """Настройки раздела подписчиков админ зоны."""
 
     list_display = ('pk', 'user', 'following')
+    list_select_related = ('user', 'following')
     search_fields = ('user__username', )
     readonly_fields = ('user', 'following')
 
@@ -85,13 +142,17 @@ class ShortLinkAdmin(admin.ModelAdmin):
     list_display = (
         'pk', 'get_recipe_name', 'get_recipe_id', 'original_url', 'short_url',
     )
-    search_fields = ('get_recipe_id', )
+    list_select_related = ('recipe', )
+    search_fields = ('recipe__name', 'short_url', 'original_url')
+    autocomplete_fields = ('recipe', )
 
     def get_recipe_id(self, obj):
-        return obj.recipe.id if obj.recipe else None
+        return obj.recipe_id
 
     def get_recipe_name(self, obj):
         return obj.recipe.name if obj.recipe else None
 
     get_recipe_id.short_description = 'Recipe PK'
+    get_recipe_id.admin_order_field = 'recipe_id'
     get_recipe_name.short_description = 'Название рецепта'
+    get_recipe_name.admin_order_field = 'recipe__name'
@@ -4,3 +4,19 @@ MAX_LENGTH_INGREDIENT_UNIT: int = 64
 MAX_TAG_NAME_SLUG_LENGTH: int = 32
 MAX_LENGTH_SHORT_URL: int = 10
 MIN_VALUE: int = 1
+MINHASH_PERMUTATIONS: int = 64
+MINHASH_BAND_ROWS: int = 2
+MINHASH_SEED: int = 20241205
+SIMILAR_MAX_CANDIDATES: int = 500
+SIMILAR_INGREDIENTS_WEIGHT: float = 0.8
+SIMILAR_TAGS_WEIGHT: float = 0.2
+FEED_FANOUT_MAX_FOLLOWERS: int = 5000
+FEED_BACKFILL_RECIPES: int = 50
+FEED_CELEBRITIES_CACHE_TTL: int = 300
+MAX_LENGTH_CHANGE_SCOPE: int = 16
+MAX_LENGTH_CHANGE_ACTION: int = 8
+SYNC_MAX_CHANGES: int = 1000
+SYNC_COMMIT_LAG: int = 2
+SYNC_RETENTION_DAYS: int = 30
+PURGE_BATCH_SIZE: int = 200
+SHORT_LINK_CREATE_ATTEMPTS: int = 3
@@ -0,0 +1,74 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+FLUSH_VIEWS_SQL = (
+    'UPDATE {recipe} AS r SET views_count = r.views_count + v.delta '
+    'FROM (VALUES {values}) AS v(id, delta) WHERE r.id = v.id'
+)
+
+
+class ViewCounter:
+    """Счётчик просмотров рецептов в памяти процесса.
+
+    Просмотры накапливаются в словаре и записываются в базу одним
+    запросом не чаще раза в ``interval`` секунд или при накоплении
+    ``max_pending`` рецептов. Просмотры, не записанные из-за ошибки базы,
+    остаются в счётчике до следующей записи.
+    """
+
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+
+    def increment(self, recipe_id, delta=1):
+        with self._lock:
+            self._pending[recipe_id] = self._pending.get(recipe_id, 0) + delta
+            due = (
+                len(self._pending) >= self.max_pending
+                or time.monotonic() - self._flushed_at >= self.interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Записывает накопленные просмотры в базу одним запросом."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        sql = FLUSH_VIEWS_SQL.format(
+            recipe=Recipe._meta.db_table,
+            values=', '.join(['(%s, %s)'] * len(pending))
+        )
+        params = [value for item in pending.items() for value in item]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+        except DatabaseError:
+            logger.exception('Failed to flush %d view counters', len(pending))
+            with self._lock:
+                for recipe_id, delta in pending.items():
+                    self._pending[recipe_id] = (
+                        self._pending.get(recipe_id, 0) + delta
+                    )
+            return 0
+        return len(pending)
+
+
+view_counter = ViewCounter(
+    settings.VIEW_COUNTS_FLUSH_INTERVAL, settings.VIEW_COUNTS_MAX_PENDING
+)
+atexit.register(view_counter.flush)
@@ -0,0 +1,37 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from recipe.constants import SYNC_RETENTION_DAYS
+from recipe.services import compact_changes
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Delete old entries of the sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=SYNC_RETENTION_DAYS,
+            help='Keep entries newer than this number of days',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of entries deleted per query',
+        )
+
+    def handle(self, *args, **kwargs):
+        deleted = compact_changes(
+            timezone.now() - timedelta(days=kwargs['days']),
+            kwargs['batch_size']
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Журнал изменений сжат: удалено {deleted} записей.'
+            )
+        )
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipe.models import Recipe, RecipeSignature
+from recipe.services import refresh_ingredient_index, refresh_signatures
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Rebuild ingredient index and MinHash signatures of all recipes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Number of recipes processed per batch',
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        recipe_ids = list(
+            Recipe.objects.order_by('id').values_list('id', flat=True)
+        )
+        for start in range(0, len(recipe_ids), batch_size):
+            batch = recipe_ids[start:start + batch_size]
+            with transaction.atomic():
+                refresh_ingredient_index(batch)
+                refresh_signatures(batch)
+        RecipeSignature.objects.filter(
+            recipe__deleted_at__isnull=False
+        ).delete()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Индекс похожих рецептов перестроен: {len(recipe_ids)} '
+                'рецептов.'
+            )
+        )
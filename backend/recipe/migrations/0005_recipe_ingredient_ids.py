@@ -0,0 +1,37 @@
+# Generated by Django 3.2 on 2026-10-19 12:59
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_ingredient_ids(apps, schema_editor):
+    schema_editor.execute(
+        'UPDATE recipe_recipe SET ingredient_ids = ARRAY('
+        'SELECT ir.ingredient_id FROM recipe_ingredientrecipe ir '
+        'WHERE ir.recipe_id = recipe_recipe.id ORDER BY ir.ingredient_id)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_auto_20241205_1410'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='recipe',
+            options={'ordering': ('-created',), 'verbose_name': 'рецепт', 'verbose_name_plural': 'Рецепты'},
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='Индекс ингредиентов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['ingredient_ids'], name='recipe_ingredient_ids_gin'),
+        ),
+        migrations.RunPython(fill_ingredient_ids, migrations.RunPython.noop),
+    ]
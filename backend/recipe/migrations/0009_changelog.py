@@ -0,0 +1,40 @@
+# Generated by Django 3.2 on 2026-10-19 13:28
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipe', '0008_recipe_views_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('scope', models.CharField(choices=[('tags', 'Теги'), ('ingredients', 'Ингредиенты'), ('favorites', 'Избранное'), ('shopping_cart', 'Список покупок'), ('follows', 'Подписки')], max_length=16, verbose_name='Раздел')),
+                ('action', models.CharField(choices=[('created', 'Создан'), ('updated', 'Изменён'), ('deleted', 'Удалён')], max_length=8, verbose_name='Действие')),
+                ('object_id', models.BigIntegerField(verbose_name='Идентификатор объекта')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата изменения')),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='changes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'изменение',
+                'verbose_name_plural': 'Журнал изменений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['user', 'id'], name='changelog_user_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['created'], name='changelog_created_idx'),
+        ),
+    ]
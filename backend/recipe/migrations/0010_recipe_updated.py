@@ -0,0 +1,24 @@
+# Generated by Django 3.2 on 2026-10-19 13:41
+
+from django.db import migrations, models
+
+
+def fill_updated(apps, schema_editor):
+    schema_editor.execute('UPDATE recipe_recipe SET updated = created')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_changelog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Дата изменения'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 3.2 on 2026-10-19 13:47
+
+from django.db import migrations
+
+CASCADE_TABLES = ('recipe_recipe', 'users_user')
+
+FOREIGN_KEYS_SQL = (
+    'SELECT c.conrelid::regclass::text, c.conname, '
+    'pg_get_constraintdef(c.oid) FROM pg_constraint c '
+    "WHERE c.contype = 'f' AND c.confrelid::regclass::text = ANY(%s) "
+    'AND c.confdeltype <> %s'
+)
+
+
+def set_on_delete(schema_editor, current, clause):
+    """Пересоздаёт внешние ключи на рецепты и пользователей с ``clause``."""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(FOREIGN_KEYS_SQL, [list(CASCADE_TABLES), current])
+        foreign_keys = cursor.fetchall()
+    quote_name = schema_editor.quote_name
+    for table, name, definition in foreign_keys:
+        definition = definition.replace(' ON DELETE CASCADE', '')
+        references, _, options = definition.partition(' DEFERRABLE')
+        schema_editor.execute(
+            'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+            'ADD CONSTRAINT {name} {references}{clause}{options}'.format(
+                table=quote_name(table),
+                name=quote_name(name),
+                references=references,
+                clause=clause,
+                options=f' DEFERRABLE{options}' if options else ''
+            )
+        )
+
+
+def add_cascades(apps, schema_editor):
+    set_on_delete(schema_editor, 'c', ' ON DELETE CASCADE')
+
+
+def remove_cascades(apps, schema_editor):
+    set_on_delete(schema_editor, 'a', '')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_soft_delete'),
+        ('users', '0002_user_deleted_at'),
+        ('admin', '0003_logentry_add_action_flag_choices'),
+        ('authtoken', '0003_tokenproxy'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_cascades, remove_cascades),
+    ]
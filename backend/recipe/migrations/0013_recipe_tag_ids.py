@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-19 13:58
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+def fill_tag_ids(apps, schema_editor):
+    schema_editor.execute(
+        'UPDATE recipe_recipe SET tag_ids = ARRAY('
+        'SELECT rt.tag_id FROM recipe_recipe_tags rt '
+        'WHERE rt.recipe_id = recipe_recipe.id ORDER BY rt.tag_id)'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0012_database_cascades'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='tag_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, default=list, editable=False, size=None, verbose_name='Индекс тегов'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+        ),
+        migrations.RunPython(fill_tag_ids, migrations.RunPython.noop),
+    ]
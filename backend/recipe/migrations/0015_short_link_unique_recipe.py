@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+def remove_duplicate_links(apps, schema_editor):
+    schema_editor.execute(
+        'DELETE FROM recipe_shortlink s USING recipe_shortlink first '
+        'WHERE s.recipe_id = first.recipe_id AND s.id > first.id'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0014_recipe_list_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_links, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='shortlink',
+            constraint=models.UniqueConstraint(fields=('recipe',), name='unique_recipe_short_link'),
+        ),
+    ]
@@ -2,11 +2,15 @@ import random
 import string
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.validators import MinValueValidator
 from django.db import models
 from django.db.models import CheckConstraint, F, Q
+from django.utils import timezone
 
-from .constants import (MAX_LENGTH_INGREDIENT_NAME, MAX_LENGTH_INGREDIENT_UNIT,
+from .constants import (MAX_LENGTH_CHANGE_ACTION, MAX_LENGTH_CHANGE_SCOPE,
+                        MAX_LENGTH_INGREDIENT_NAME, MAX_LENGTH_INGREDIENT_UNIT,
                         MAX_LENGTH_RECIPE_NAME, MAX_LENGTH_SHORT_URL,
                         MAX_TAG_NAME_SLUG_LENGTH, MIN_VALUE)
 
@@ -64,8 +68,27 @@ class Ingredient(models.Model):
         return self.name
 
 
+class RecipeManager(models.Manager):
+    """Менеджер рецептов без помеченных удалёнными."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Recipe(models.Model):
-    """Модель рецепта."""
+    """Модель рецепта.
+
+    Удалённый рецепт помечается ``deleted_at`` и скрывается менеджером
+    ``objects``, а строки рецепта и связанных с ним объектов удаляются
+    фоновой задачей. ``all_objects`` возвращает все рецепты.
+
+    Строки, ссылающиеся на рецепт, удаляются каскадом внешних ключей в
+    базе (миграция ``0012_database_cascades``), о котором Django не знает.
+    Миграция, пересоздающая такой внешний ключ (например, ``AlterField``),
+    должна снова вызвать ``set_on_delete`` из ``0012``, иначе очистка
+    удалённых рецептов упадёт на нарушении ключа. Каскад проверяет
+    ``recipe.tests.DatabaseCascadeTest``.
+    """
 
     author = models.ForeignKey(
         User,
@@ -96,11 +119,68 @@ class Recipe(models.Model):
         Tag, related_name='recipes', verbose_name='Теги'
     )
     created = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+    views_count = models.PositiveBigIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False
+    )
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    ingredient_ids = ArrayField(
+        models.IntegerField(),
+        verbose_name='Индекс ингредиентов',
+        default=list,
+        blank=True,
+        editable=False
+    )
+    tag_ids = ArrayField(
+        models.IntegerField(),
+        verbose_name='Индекс тегов',
+        default=list,
+        blank=True,
+        editable=False
+    )
+
+    objects = RecipeManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-created', )
+        indexes = [
+            GinIndex(
+                fields=['ingredient_ids'],
+                name='recipe_ingredient_ids_gin'
+            ),
+            GinIndex(fields=['tag_ids'], name='recipe_tag_ids_gin'),
+            models.Index(
+                fields=['-created', 'id'],
+                name='recipe_created_idx'
+            ),
+            models.Index(
+                fields=['author', '-created'],
+                name='recipe_author_created_idx'
+            ),
+            models.Index(
+                fields=['cooking_time', '-created'],
+                name='recipe_cooking_time_idx'
+            ),
+            models.Index(
+                fields=['-views_count', '-created'],
+                name='recipe_views_count_idx'
+            ),
+            models.Index(
+                fields=['deleted_at'],
+                condition=Q(deleted_at__isnull=False),
+                name='recipe_deleted_at_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -140,6 +220,33 @@ class IngredientRecipe(models.Model):
         return f'{self.ingredient} для {self.recipe}'
 
 
+class RecipeSignature(models.Model):
+    """MinHash-сигнатура ингредиентов рецепта для поиска похожих."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт'
+    )
+    signature = models.BinaryField('MinHash-сигнатура')
+    bands = ArrayField(
+        models.BigIntegerField(),
+        verbose_name='LSH-полосы'
+    )
+
+    class Meta:
+        verbose_name = 'сигнатура рецепта'
+        verbose_name_plural = 'Сигнатуры рецептов'
+        indexes = [
+            GinIndex(fields=['bands'], name='recipe_signature_bands_gin'),
+        ]
+
+    def __str__(self):
+        return f'Сигнатура рецепта {self.recipe_id}'
+
+
 class Follow(models.Model):
     """Модель подписок."""
 
@@ -168,6 +275,43 @@ class Follow(models.Model):
         return f'{self.user} подписан на {self.following}'
 
 
+class FeedEntry(models.Model):
+    """Запись ленты подписок пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Пользователь'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    created = models.DateTimeField('Дата создания рецепта')
+
+    class Meta:
+        verbose_name = 'запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', '-created'],
+                name='feed_user_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
 class ShoppingCartFavorite(models.Model):
     """Базовая модель для списка покупок и избранного."""
 
@@ -238,6 +382,12 @@ class ShortLink(models.Model):
     class Meta:
         verbose_name = 'короткая ссылка'
         verbose_name_plural = 'Короткие ссылки'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipe'],
+                name='unique_recipe_short_link'
+            )
+        ]
 
     def __str__(self):
         return f'Короткая ссылка для рецепта: {self.recipe.name}'
@@ -259,3 +409,66 @@ class ShortLink(models.Model):
         while ShortLink.objects.filter(short_url=short_code).exists():
             short_code = self.generate_short_url()
         return short_code
+
+
+class ChangeLog(models.Model):
+    """Журнал изменений для синхронизации клиентских кешей.
+
+    Записи только добавляются; идентификатор записи служит токеном
+    синхронизации. Записи каталогов (теги, ингредиенты) общие, записи
+    избранного, списка покупок и подписок относятся к пользователю.
+    Записи удалённых пользователей не удаляются каскадно, а остаются
+    до сжатия журнала: при удалении пользователя сигналы удаления его
+    подписок и избранного добавляют новые записи.
+    """
+
+    TAGS = 'tags'
+    INGREDIENTS = 'ingredients'
+    FAVORITES = 'favorites'
+    SHOPPING_CART = 'shopping_cart'
+    FOLLOWS = 'follows'
+    SCOPE_CHOICES = (
+        (TAGS, 'Теги'),
+        (INGREDIENTS, 'Ингредиенты'),
+        (FAVORITES, 'Избранное'),
+        (SHOPPING_CART, 'Список покупок'),
+        (FOLLOWS, 'Подписки'),
+    )
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = (
+        (CREATED, 'Создан'),
+        (UPDATED, 'Изменён'),
+        (DELETED, 'Удалён'),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    scope = models.CharField(
+        'Раздел', max_length=MAX_LENGTH_CHANGE_SCOPE, choices=SCOPE_CHOICES
+    )
+    action = models.CharField(
+        'Действие', max_length=MAX_LENGTH_CHANGE_ACTION, choices=ACTION_CHOICES
+    )
+    object_id = models.BigIntegerField('Идентификатор объекта')
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='changes',
+        verbose_name='Пользователь',
+        null=True,
+        blank=True
+    )
+    created = models.DateTimeField('Дата изменения', default=timezone.now)
+
+    class Meta:
+        verbose_name = 'изменение'
+        verbose_name_plural = 'Журнал изменений'
+        indexes = [
+            models.Index(fields=['user', 'id'], name='changelog_user_id_idx'),
+            models.Index(fields=['created'], name='changelog_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.scope} {self.object_id} {self.action}'
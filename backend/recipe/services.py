@@ -0,0 +1,439 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, F, Func, OuterRef, Q, Value
+from django.db.models.expressions import RawSQL
+from django.dispatch import Signal
+from django.utils import timezone
+from jobs.services import enqueue
+
+from .constants import (FEED_BACKFILL_RECIPES, FEED_CELEBRITIES_CACHE_TTL,
+                        FEED_FANOUT_MAX_FOLLOWERS, SHORT_LINK_CREATE_ATTEMPTS,
+                        SYNC_COMMIT_LAG, SYNC_MAX_CHANGES)
+from .models import (ChangeLog, Favorite, FeedEntry, Follow, Ingredient,
+                     IngredientRecipe, Recipe, RecipeSignature, ShoppingCart,
+                     ShortLink, Tag)
+from .similarity import lsh_bands, minhash_signature, signature_to_bytes
+
+INGREDIENT_INDEX_SQL = (
+    'ARRAY(SELECT ir.ingredient_id FROM {table} ir '
+    'WHERE ir.recipe_id = {recipe_table}.id ORDER BY ir.ingredient_id)'
+).format(
+    table=IngredientRecipe._meta.db_table,
+    recipe_table=Recipe._meta.db_table
+)
+
+TAG_INDEX_SQL = (
+    'ARRAY(SELECT rt.tag_id FROM {table} rt '
+    'WHERE rt.recipe_id = {recipe_table}.id ORDER BY rt.tag_id)'
+).format(
+    table=Recipe.tags.through._meta.db_table,
+    recipe_table=Recipe._meta.db_table
+)
+
+User = get_user_model()
+
+recipes_deleted = Signal()
+users_deleted = Signal()
+
+PURGE_SQL = 'DELETE FROM {table} WHERE id = ANY(%s)'
+
+FEED_CELEBRITIES_CACHE_KEY = 'recipe:feed:fanout-on-read-authors'
+
+FEED_FANOUT_SQL = (
+    'INSERT INTO {feed} (user_id, recipe_id, created) '
+    'SELECT f.user_id, r.id, r.created FROM {follow} f '
+    'JOIN {recipe} r ON r.author_id = f.following_id '
+    'WHERE r.id = %s ON CONFLICT DO NOTHING'
+).format(
+    feed=FeedEntry._meta.db_table,
+    follow=Follow._meta.db_table,
+    recipe=Recipe._meta.db_table
+)
+
+FEED_BACKFILL_SQL = (
+    'INSERT INTO {feed} (user_id, recipe_id, created) '
+    'SELECT %s, r.id, r.created FROM {recipe} r WHERE r.author_id = %s '
+    'ORDER BY r.created DESC LIMIT %s ON CONFLICT DO NOTHING'
+).format(
+    feed=FeedEntry._meta.db_table,
+    recipe=Recipe._meta.db_table
+)
+
+
+def refresh_ingredient_index(recipe_ids):
+    """Пересчитывает индекс ингредиентов рецептов одним запросом."""
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        ingredient_ids=RawSQL(INGREDIENT_INDEX_SQL, ())
+    )
+
+
+def build_signature(recipe_id, ingredient_ids):
+    """Строит сигнатуру рецепта по набору его ингредиентов."""
+    signature = minhash_signature(ingredient_ids)
+    return RecipeSignature(
+        recipe_id=recipe_id,
+        signature=signature_to_bytes(signature),
+        bands=lsh_bands(signature)
+    )
+
+
+def refresh_signatures(recipe_ids):
+    """Пересчитывает сигнатуры рецептов по индексу ингредиентов."""
+    recipes = Recipe.objects.filter(id__in=recipe_ids).values_list(
+        'id', 'ingredient_ids'
+    )
+    RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSignature.objects.bulk_create(
+        build_signature(recipe_id, ingredient_ids)
+        for recipe_id, ingredient_ids in recipes
+        if ingredient_ids
+    )
+
+
+def refresh_tag_index(recipe_ids):
+    """Пересчитывает индекс тегов и дату изменения рецептов."""
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        tag_ids=RawSQL(TAG_INDEX_SQL, ()),
+        updated=timezone.now()
+    )
+
+
+def remove_from_tag_index(tag_id):
+    """Убирает удалённый тег из индекса тегов рецептов."""
+    Recipe.all_objects.filter(tag_ids__contains=[tag_id]).update(
+        tag_ids=Func(F('tag_ids'), Value(tag_id), function='array_remove')
+    )
+
+
+def refresh_recipe_indexes(recipe_ids):
+    """Пересчитывает индексы ингредиентов и тегов и сигнатуры рецептов.
+
+    Вызывается после пакетной записи ингредиентов, которая не отправляет
+    сигналы моделей, и после сохранения рецепта целиком, которое
+    перезаписывает индексы значениями из памяти. Дата изменения рецептов
+    при этом обновляется.
+    """
+    Recipe.objects.filter(id__in=recipe_ids).update(
+        ingredient_ids=RawSQL(INGREDIENT_INDEX_SQL, ()),
+        tag_ids=RawSQL(TAG_INDEX_SQL, ()),
+        updated=timezone.now()
+    )
+    refresh_signatures(recipe_ids)
+
+
+def get_or_create_short_link(recipe_id):
+    """Короткая ссылка рецепта; создаётся, если её ещё нет.
+
+    Ссылку одновременно могут создавать задача после публикации рецепта
+    и запрос ``get-link``. У рецепта одна ссылка: при одновременном
+    создании ``get_or_create`` получает ``IntegrityError`` и возвращает
+    уже созданную. Запись повторяется, если совпал случайный код.
+    """
+    for attempt in range(1, SHORT_LINK_CREATE_ATTEMPTS + 1):
+        try:
+            return ShortLink.objects.get_or_create(
+                recipe_id=recipe_id,
+                defaults={'original_url': f'/recipes/{recipe_id}/'}
+            )[0]
+        except IntegrityError:
+            if attempt == SHORT_LINK_CREATE_ATTEMPTS:
+                raise
+
+
+def get_fanout_on_read_authors():
+    """Авторы с большим числом подписчиков.
+
+    Их рецепты не раскладываются по лентам подписчиков при публикации,
+    а подмешиваются в ленту при чтении.
+    """
+    authors = cache.get(FEED_CELEBRITIES_CACHE_KEY)
+    if authors is None:
+        authors = set(
+            Follow.objects.values('following_id').annotate(
+                followers_count=Count('id')
+            ).filter(
+                followers_count__gt=FEED_FANOUT_MAX_FOLLOWERS
+            ).values_list('following_id', flat=True)
+        )
+        cache.set(
+            FEED_CELEBRITIES_CACHE_KEY, authors, FEED_CELEBRITIES_CACHE_TTL
+        )
+    return authors
+
+
+def fan_out_recipe(recipe_id, author_id):
+    """Добавляет новый рецепт в ленты подписчиков автора."""
+    if author_id in get_fanout_on_read_authors():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(FEED_FANOUT_SQL, [recipe_id])
+
+
+def backfill_feed(user_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    if author_id in get_fanout_on_read_authors():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            FEED_BACKFILL_SQL, [user_id, author_id, FEED_BACKFILL_RECIPES]
+        )
+
+
+def purge_feed(user_id, author_id):
+    """Удаляет из ленты рецепты автора после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, recipe__author_id=author_id
+    ).delete()
+
+
+def keyset_page(queryset, id_field, limit, position, reverse):
+    """До ``limit + 1`` ключей ``(created, id_field)`` после ``position``.
+
+    Без ``reverse`` ключи идут от новых к старым, с ``reverse`` —
+    от старых к новым, начиная с ключей новее ``position``.
+    """
+    lookup = 'gt' if reverse else 'lt'
+    if position is not None:
+        created, object_id = position
+        queryset = queryset.filter(**{f'created__{lookup}e': created}).filter(
+            Q(**{f'created__{lookup}': created})
+            | Q(**{f'{id_field}__{lookup}': object_id})
+        )
+    sign = '' if reverse else '-'
+    return list(
+        queryset.order_by(
+            f'{sign}created', f'{sign}{id_field}'
+        ).values_list('created', id_field)[:limit + 1]
+    )
+
+
+def get_feed_keys(user, limit, position=None, reverse=False):
+    """Ключи ``(created, recipe_id)`` страницы ленты подписок.
+
+    Записи ленты читаются по индексу ``(user, -created)``, рецепты
+    авторов с раскладкой при чтении — отдельным запросом по индексу
+    ``(author, -created)``; оба запроса ограничены ``limit + 1`` строками.
+    Порядок и смысл ``position`` и ``reverse`` как у ``keyset_page``.
+    """
+    keys = set(keyset_page(
+        FeedEntry.objects.filter(user=user, recipe__deleted_at__isnull=True),
+        'recipe_id', limit, position, reverse
+    ))
+    celebrities = get_fanout_on_read_authors()
+    if celebrities:
+        keys.update(keyset_page(
+            Recipe.objects.filter(
+                author_id__in=Follow.objects.filter(
+                    user=user, following_id__in=celebrities
+                ).values('following_id')
+            ),
+            'id', limit, position, reverse
+        ))
+    return sorted(keys, reverse=not reverse)[:limit + 1]
+
+
+CHANGE_SCOPES = {
+    Tag: ChangeLog.TAGS,
+    Ingredient: ChangeLog.INGREDIENTS,
+    Favorite: ChangeLog.FAVORITES,
+    ShoppingCart: ChangeLog.SHOPPING_CART,
+    Follow: ChangeLog.FOLLOWS,
+}
+
+
+def record_changes(model, action, object_ids, user_id=None):
+    """Добавляет записи журнала изменений одним запросом.
+
+    Вызывается явно там, где запись идёт в обход сигналов моделей:
+    сырым SQL или пакетными операциями.
+    """
+    ChangeLog.objects.bulk_create(
+        ChangeLog(
+            scope=CHANGE_SCOPES[model],
+            action=action,
+            object_id=object_id,
+            user_id=user_id
+        )
+        for object_id in object_ids
+    )
+
+
+def get_changes(user, since, limit=SYNC_MAX_CHANGES):
+    """Изменения каталогов и данных пользователя после токена ``since``.
+
+    Возвращаются только записи старше ``SYNC_COMMIT_LAG`` секунд, чтобы
+    запись незавершённой транзакции с меньшим идентификатором не оказалась
+    позади выданного токена. Если ``since`` не указан или записи после него
+    уже удалены при сжатии журнала, возвращается ``reset``: клиенту нужно
+    загрузить данные целиком.
+    """
+    entries = ChangeLog.objects.filter(
+        created__lte=timezone.now() - timedelta(seconds=SYNC_COMMIT_LAG)
+    )
+    oldest_id = ChangeLog.objects.order_by('id').values_list(
+        'id', flat=True
+    ).first()
+    if since is None or (oldest_id is not None and since < oldest_id - 1):
+        token = entries.order_by('-id').values_list('id', flat=True).first()
+        return {
+            'token': token or 0, 'reset': True, 'has_more': False,
+            'changes': {}
+        }
+    audience = Q(user__isnull=True)
+    if user.is_authenticated:
+        audience |= Q(user=user)
+    rows = list(
+        entries.filter(audience, id__gt=since).order_by('id').values_list(
+            'id', 'scope', 'action', 'object_id'
+        )[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    states = {}
+    for _, scope, action, object_id in rows:
+        previous = states.get((scope, object_id))
+        if previous == ChangeLog.CREATED and action == ChangeLog.UPDATED:
+            action = ChangeLog.CREATED
+        states[(scope, object_id)] = action
+    changes = {
+        scope: {
+            ChangeLog.CREATED: [],
+            ChangeLog.UPDATED: [],
+            ChangeLog.DELETED: [],
+        }
+        for scope, _ in ChangeLog.SCOPE_CHOICES
+    }
+    for (scope, object_id), action in states.items():
+        changes[scope][action].append(object_id)
+    return {
+        'token': rows[-1][0] if rows else since,
+        'reset': False,
+        'has_more': has_more,
+        'changes': changes,
+    }
+
+
+def compact_changes(before, batch_size):
+    """Удаляет записи журнала изменений старше ``before`` пачками.
+
+    Последняя запись журнала сохраняется: по ней клиенты с устаревшим
+    токеном определяют, что журнал был сжат.
+    """
+    newest_id = ChangeLog.objects.order_by('-id').values_list(
+        'id', flat=True
+    ).first()
+    deleted = 0
+    while True:
+        batch = list(
+            ChangeLog.objects.filter(
+                created__lt=before, id__lt=newest_id or 0
+            ).order_by('id').values_list('id', flat=True)[:batch_size]
+        )
+        if not batch:
+            return deleted
+        deleted += ChangeLog.objects.filter(id__in=batch).delete()[0]
+
+
+def record_cascaded_deletions(model, object_field, **filters):
+    """Записывает в журнал изменений строки, удаляемые каскадом базы."""
+    ChangeLog.objects.bulk_create(
+        ChangeLog(
+            scope=CHANGE_SCOPES[model],
+            action=ChangeLog.DELETED,
+            object_id=object_id,
+            user_id=user_id
+        )
+        for user_id, object_id in model.objects.filter(
+            **filters
+        ).values_list('user_id', object_field)
+    )
+
+
+@transaction.atomic
+def soft_delete_recipes(recipe_ids):
+    """Помечает рецепты удалёнными и ставит в очередь их очистку."""
+    recipes = Recipe.objects.filter(id__in=recipe_ids)
+    deleted = list(recipes.values_list('id', 'author_id'))
+    recipes.update(deleted_at=timezone.now())
+    recipes_deleted.send(sender=Recipe, recipes=deleted)
+    enqueue('recipe.purge_deleted')
+    return len(deleted)
+
+
+@transaction.atomic
+def soft_delete_users(user_ids):
+    """Деактивирует пользователей, помечает их и их рецепты удалёнными.
+
+    Строки удаляются фоновой задачей, запрос выполняет только два
+    ``UPDATE``.
+    """
+    now = timezone.now()
+    recipes = Recipe.objects.filter(author_id__in=user_ids)
+    deleted = list(recipes.values_list('id', 'author_id'))
+    recipes.update(deleted_at=now)
+    User.objects.filter(id__in=user_ids).update(
+        is_active=False, deleted_at=now
+    )
+    recipes_deleted.send(sender=Recipe, recipes=deleted)
+    users_deleted.send(sender=User, user_ids=list(user_ids))
+    enqueue('recipe.purge_deleted')
+
+
+def purge_deleted_recipes(batch_size):
+    """Удаляет пачку помеченных удалёнными рецептов.
+
+    Связанные строки (ингредиенты, теги, избранное, списки покупок,
+    ленты, короткие ссылки) удаляются каскадом внешних ключей в базе,
+    без загрузки в память. Изображения удаляются отдельной задачей после
+    фиксации транзакции.
+    """
+    recipes = list(
+        Recipe.all_objects.filter(
+            deleted_at__isnull=False
+        ).select_for_update(skip_locked=True).order_by('id').values_list(
+            'id', 'image'
+        )[:batch_size]
+    )
+    if not recipes:
+        return 0
+    recipe_ids = [recipe_id for recipe_id, _ in recipes]
+    for model in (Favorite, ShoppingCart):
+        record_cascaded_deletions(model, 'recipe_id', recipe_id__in=recipe_ids)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            PURGE_SQL.format(table=Recipe._meta.db_table), [recipe_ids]
+        )
+    images = [image for _, image in recipes if image]
+    if images:
+        enqueue('jobs.delete_files', names=images)
+    return len(recipes)
+
+
+def purge_deleted_users(batch_size):
+    """Удаляет пачку помеченных удалёнными пользователей без рецептов.
+
+    Подписки, избранное, списки покупок и токены удаляются каскадом
+    внешних ключей в базе, аватары — отдельной задачей.
+    """
+    users = list(
+        User.objects.filter(deleted_at__isnull=False).exclude(
+            Exists(Recipe.all_objects.filter(author=OuterRef('pk')))
+        ).select_for_update(skip_locked=True).order_by('id').values_list(
+            'id', 'avatar'
+        )[:batch_size]
+    )
+    if not users:
+        return 0
+    user_ids = [user_id for user_id, _ in users]
+    record_cascaded_deletions(
+        Follow, 'following_id', following_id__in=user_ids
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(PURGE_SQL.format(table=User._meta.db_table), [user_ids])
+    avatars = [avatar for _, avatar in users if avatar]
+    if avatars:
+        enqueue('jobs.delete_files', names=avatars)
+    return len(users)
@@ -0,0 +1,81 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import (ChangeLog, Favorite, Follow, Ingredient, IngredientRecipe,
+                     Recipe, ShoppingCart, Tag)
+from .services import (record_changes, refresh_recipe_indexes,
+                       refresh_tag_index, remove_from_tag_index)
+
+
+@receiver(post_save, sender=IngredientRecipe)
+@receiver(post_delete, sender=IngredientRecipe)
+def update_ingredient_index(sender, instance, **kwargs):
+    """Синхронизирует индексы ингредиентов рецепта с IngredientRecipe."""
+    refresh_recipe_indexes([instance.recipe_id])
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def update_recipe_tags(sender, instance, action, reverse, pk_set, **kwargs):
+    """Пересчитывает индекс тегов рецептов при изменении их тегов."""
+    if reverse and action == 'pre_clear':
+        instance._cleared_recipe_ids = list(
+            instance.recipes.values_list('id', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        refresh_tag_index([instance.pk])
+    elif action == 'post_clear':
+        refresh_tag_index(instance.__dict__.pop('_cleared_recipe_ids', ()))
+    else:
+        refresh_tag_index(pk_set)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+def catalog_saved(sender, instance, created, **kwargs):
+    """Записывает изменение каталога в журнал изменений."""
+    record_changes(
+        sender,
+        ChangeLog.CREATED if created else ChangeLog.UPDATED,
+        [instance.pk]
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+def catalog_deleted(sender, instance, **kwargs):
+    """Записывает удаление из каталога в журнал изменений."""
+    record_changes(sender, ChangeLog.DELETED, [instance.pk])
+    if sender is Tag:
+        remove_from_tag_index(instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+def user_item_saved(sender, instance, created, **kwargs):
+    """Записывает добавление в избранное, покупки или подписки."""
+    if created:
+        record_changes(
+            sender, ChangeLog.CREATED, [get_item_object_id(instance)],
+            instance.user_id
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Follow)
+def user_item_deleted(sender, instance, **kwargs):
+    """Записывает удаление из избранного, покупок или подписок."""
+    record_changes(
+        sender, ChangeLog.DELETED, [get_item_object_id(instance)],
+        instance.user_id
+    )
+
+
+def get_item_object_id(instance):
+    if isinstance(instance, Follow):
+        return instance.following_id
+    return instance.recipe_id
@@ -0,0 +1,81 @@
+import hashlib
+
+import numpy as np
+
+from .constants import (MINHASH_BAND_ROWS, MINHASH_PERMUTATIONS, MINHASH_SEED,
+                        SIMILAR_INGREDIENTS_WEIGHT, SIMILAR_TAGS_WEIGHT)
+
+PRIME = np.uint64((1 << 31) - 1)
+SIGNATURE_DTYPE = np.uint32
+
+_rng = np.random.default_rng(MINHASH_SEED)
+_COEF_A = _rng.integers(1, PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_COEF_B = _rng.integers(0, PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash_signature(ingredient_ids):
+    """MinHash-сигнатура набора ингредиентов."""
+    ids = np.asarray(ingredient_ids, dtype=np.uint64).reshape(-1, 1)
+    hashes = (ids * _COEF_A + _COEF_B) % PRIME
+    return hashes.min(axis=0).astype(SIGNATURE_DTYPE)
+
+
+def lsh_bands(signature):
+    """Хеши LSH-полос сигнатуры для поиска кандидатов по GIN-индексу."""
+    bands = signature.reshape(-1, MINHASH_BAND_ROWS)
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                band.tobytes(), digest_size=8, salt=index.to_bytes(8, 'big')
+            ).digest(),
+            'big',
+            signed=True
+        )
+        for index, band in enumerate(bands)
+    ]
+
+
+def signature_to_bytes(signature):
+    return signature.astype(SIGNATURE_DTYPE).tobytes()
+
+
+def signatures_from_bytes(blobs):
+    """Собирает сигнатуры кандидатов в матрицу для векторной оценки."""
+    buffer = b''.join(bytes(blob) for blob in blobs)
+    return np.frombuffer(buffer, dtype=SIGNATURE_DTYPE).reshape(
+        -1, MINHASH_PERMUTATIONS
+    )
+
+
+def tags_jaccard(tag_ids, candidate_tag_ids):
+    """Коэффициент Жаккара тегов рецепта с тегами каждого кандидата."""
+    vocabulary = {
+        tag_id: index for index, tag_id in enumerate(
+            set(tag_ids).union(*candidate_tag_ids)
+        )
+    }
+    if not vocabulary:
+        return np.zeros(len(candidate_tag_ids))
+    matrix = np.zeros((len(candidate_tag_ids), len(vocabulary)), dtype=bool)
+    for row, tags in enumerate(candidate_tag_ids):
+        matrix[row, [vocabulary[tag_id] for tag_id in tags]] = True
+    target = np.zeros(len(vocabulary), dtype=bool)
+    target[[vocabulary[tag_id] for tag_id in tag_ids]] = True
+    intersection = (matrix & target).sum(axis=1)
+    union = (matrix | target).sum(axis=1)
+    return np.divide(
+        intersection, union, out=np.zeros(len(union)), where=union > 0
+    )
+
+
+def similarity_scores(signature, tag_ids, candidates, candidate_tag_ids):
+    """Оценка похожести рецепта на кандидатов.
+
+    Доля совпавших позиций MinHash-сигнатур оценивает коэффициент Жаккара
+    наборов ингредиентов, к ней добавляется пересечение тегов.
+    """
+    ingredients_score = (candidates == signature).mean(axis=1)
+    return (
+        SIMILAR_INGREDIENTS_WEIGHT * ingredients_score
+        + SIMILAR_TAGS_WEIGHT * tags_jaccard(tag_ids, candidate_tag_ids)
+    )
@@ -0,0 +1,29 @@
+from jobs.services import enqueue, task
+
+from .constants import PURGE_BATCH_SIZE
+from .services import (fan_out_recipe, get_or_create_short_link,
+                       purge_deleted_recipes, purge_deleted_users)
+
+
+@task('recipe.create_short_link')
+def create_short_link(recipe_id):
+    get_or_create_short_link(recipe_id)
+
+
+@task('recipe.fan_out')
+def fan_out(recipe_id, author_id):
+    fan_out_recipe(recipe_id, author_id)
+
+
+@task('recipe.purge_deleted')
+def purge_deleted(batch_size=PURGE_BATCH_SIZE):
+    """Удаляет одну пачку рецептов, затем пользователей.
+
+    Пока остаются строки для удаления, задача ставит в очередь следующую
+    пачку, поэтому каждая транзакция короткая.
+    """
+    if (
+        purge_deleted_recipes(batch_size) == batch_size
+        or purge_deleted_users(batch_size) == batch_size
+    ):
+        enqueue('recipe.purge_deleted', batch_size=batch_size)
@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from .models import Recipe
+
+User = get_user_model()
+
+FOREIGN_KEYS_SQL = (
+    'SELECT c.conrelid::regclass::text, c.conname, c.confdeltype '
+    "FROM pg_constraint c WHERE c.contype = 'f' "
+    'AND c.confrelid::regclass::text = ANY(%s) ORDER BY 1, 2'
+)
+
+
+class DatabaseCascadeTest(TestCase):
+    """Внешние ключи на рецепты и пользователей удаляются каскадом в базе.
+
+    На каскад полагаются ``purge_deleted_recipes`` и
+    ``purge_deleted_users``, удаляющие строки запросом ``DELETE``.
+    """
+
+    def test_foreign_keys_cascade(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest('Каскады задаются только в PostgreSQL.')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                FOREIGN_KEYS_SQL,
+                [[Recipe._meta.db_table, User._meta.db_table]]
+            )
+            foreign_keys = cursor.fetchall()
+        self.assertTrue(foreign_keys)
+        self.assertEqual(
+            [
+                (table, name) for table, name, on_delete in foreign_keys
+                if on_delete != 'c'
+            ],
+            []
+        )
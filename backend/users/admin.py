@@ -1,9 +1,11 @@
 from django.contrib import admin
+from recipe.admin import BackgroundDeleteMixin
+from recipe.services import soft_delete_users
 
 from .models import User
 
 
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(BackgroundDeleteMixin, admin.ModelAdmin):
     """Настройки раздела пользователей админ зоны."""
 
     list_display = (
@@ -17,6 +19,10 @@ class UserAdmin(admin.ModelAdmin):
     empty_value_display = 'значение отсутствует'
     list_filter = ('username', )
     search_fields = ('username', 'email')
+    soft_delete = staticmethod(soft_delete_users)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(deleted_at__isnull=True)
 
 
 admin.site.register(User, UserAdmin)
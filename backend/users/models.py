@@ -1,11 +1,20 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Q
 
 from .constants import MAX_LENGTH_NAME
 
 
 class User(AbstractUser):
-    """Модель пользователя."""
+    """Модель пользователя.
+
+    Удалённый пользователь деактивируется и помечается ``deleted_at``,
+    строка пользователя удаляется фоновой задачей после его рецептов.
+
+    Как и у рецептов, внешние ключи на пользователя удаляются каскадом в
+    базе (миграция ``recipe.0012_database_cascades``): миграция,
+    пересоздающая такой ключ, должна снова вызвать ``set_on_delete``.
+    """
 
     first_name = models.CharField(
         'Имя',
@@ -35,6 +44,12 @@ class User(AbstractUser):
         upload_to='media/users/',
         blank=True
     )
+    deleted_at = models.DateTimeField(
+        'Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'first_name', 'last_name']
 
@@ -42,6 +57,13 @@ class User(AbstractUser):
         verbose_name = 'пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('username', )
+        indexes = [
+            models.Index(
+                fields=['deleted_at'],
+                condition=Q(deleted_at__isnull=False),
+                name='user_deleted_at_idx'
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.username